@@ -3,21 +3,86 @@
 Asana CLI - Manage your personal Asana tasks from the command line
 """
 
+import csv
 import json
+import queue
+import re
 import sys
-from datetime import datetime, timedelta
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import click
-import requests
-from dateutil import parser as date_parser
 
 
 # Look for config file in the parent directory (pm-context/)
 SCRIPT_DIR = Path(__file__).parent
 CONFIG_FILE = SCRIPT_DIR.parent.parent / "config.json"
+
+# Shared transport helpers live in tools/shared/
+sys.path.insert(0, str(SCRIPT_DIR.parent / "shared"))
+import daemon
+import http_session
+import output
+import scheduler
+import tracing
+
+from task_render import TaskWriter
+
 ASANA_API_BASE = "https://app.asana.com/api/1.0"
 
+# Local task mirror used by `list` (see task_store.py)
+CACHE_FILE = SCRIPT_DIR / ".cache" / "tasks.sqlite3"
+
+# Seconds a synced project is answered from the cache without asking Asana
+DEFAULT_CACHE_MAX_AGE = 60
+
+# Incremental syncs can't see deleted or moved tasks, so re-download daily
+FULL_SYNC_INTERVAL = 24 * 60 * 60
+
+# Overlap between incremental syncs to absorb clock skew with Asana
+MODIFIED_SINCE_SKEW = timedelta(minutes=1)
+
+TASK_OPT_FIELDS = ("name,completed,due_on,notes,gid,permalink_url,modified_at,"
+                   "memberships.project.gid,memberships.section.name,memberships.section.gid")
+SUBTASK_OPT_FIELDS = "name,completed,due_on,notes,gid,permalink_url"
+
+# Parallel requests used when fanning out per-task fetches (e.g. subtasks)
+DEFAULT_CONCURRENCY = 8
+
+# Items per page requested from paginated collection endpoints (Asana max: 100)
+DEFAULT_PAGE_SIZE = 100
+
+# How often a prefetch thread waiting on a full buffer checks whether its consumer is gone
+PREFETCH_POLL_INTERVAL = 0.1
+
+# Asana's limit on actions per /batch request
+BATCH_SIZE = 10
+
+STDIN_TASKS_HELP = 'Also read tasks from stdin: one task ID per line, or NDJSON objects with "task_id"'
+
+# Asana's documented quota for paid workspaces (free ones get 150/min; the
+# scheduler slows down on its own when Asana answers 429)
+ASANA_RATE_LIMITS = {"read": (1500, 60)}
+
+
+# Parsed config.json, reused while the file is unchanged (e.g. across daemon commands)
+_config_cache = {}
+
+
+def read_config_file():
+    """Return the parsed config file, re-reading it only when it changes"""
+    stat = CONFIG_FILE.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _config_cache.get("key") != key:
+        with open(CONFIG_FILE) as f:
+            _config_cache["data"] = json.load(f)
+        _config_cache["key"] = key
+    return _config_cache["data"]
+
 
 def load_config():
     """Load configuration from config file"""
@@ -27,11 +92,10 @@ def load_config():
         click.echo(f"See {CONFIG_FILE.parent / 'config.json.example'} for template.", err=True)
         raise click.Abort()
 
-    with open(CONFIG_FILE) as f:
-        full_config = json.load(f)
+    full_config = read_config_file()
 
     # Extract Asana-specific config
-    config = full_config.get("asana", {})
+    config = dict(full_config.get("asana", {}))
 
     if not config.get("api_token"):
         click.echo("Error: asana.api_token not set in config file", err=True)
@@ -46,6 +110,11 @@ def load_config():
 
 def asana_request(method, endpoint, config, **kwargs):
     """Make an authenticated request to Asana API"""
+    return asana_request_json(method, endpoint, config, **kwargs).get("data")
+
+
+def asana_request_json(method, endpoint, config, **kwargs):
+    """Make an authenticated request to Asana API and return the full response body"""
     headers = {
         "Authorization": f"Bearer {config['api_token']}",
         "Accept": "application/json",
@@ -53,10 +122,18 @@ def asana_request(method, endpoint, config, **kwargs):
 
     url = f"{ASANA_API_BASE}/{endpoint}"
 
+    # Imported here so commands that never hit the network start faster
+    import requests
+
     try:
-        response = requests.request(method, url, headers=headers, **kwargs)
-        response.raise_for_status()
-        return response.json().get("data")
+        with tracing.span(f"{method} {tracing.endpoint_template(endpoint)}", "api", endpoint=endpoint) as span:
+            # The scheduler paces requests, honors Retry-After and retries transient errors
+            response = scheduler.get_scheduler("asana", config, ASANA_RATE_LIMITS).send(
+                method, lambda: http_session.get_pool(config).request(method, url, headers=headers, **kwargs)
+            )
+            span.set(status=response.status_code, bytes=len(response.content))
+            response.raise_for_status()
+            return response.json()
     except requests.exceptions.HTTPError as e:
         click.echo(f"API Error: {e}", err=True)
         if e.response is not None:
@@ -73,18 +150,441 @@ def asana_request(method, endpoint, config, **kwargs):
         raise click.Abort()
 
 
+def asana_paginate(endpoint, config, params=None, page_size=DEFAULT_PAGE_SIZE):
+    """Yield pages (lists of items) from a paginated Asana collection
+
+    Follows the next_page offsets returned by Asana, requesting page_size
+    items at a time, so large collections are never loaded in one payload.
+    """
+    params = dict(params or {}, limit=page_size)
+
+    while True:
+        body = asana_request_json("GET", endpoint, config, params=params)
+        yield body.get("data") or []
+
+        next_page = body.get("next_page")
+        if not next_page or not next_page.get("offset"):
+            break
+        params = dict(params, offset=next_page["offset"])
+
+
+def prefetch(iterable, depth=1):
+    """Consume an iterable on a background thread, staying up to depth items ahead
+
+    The first item starts downloading as soon as this is called, before the
+    caller begins iterating. Errors are re-raised in the consuming thread.
+    If the consumer stops early (an error elsewhere, a closed pipe, or the
+    generator being closed or dropped), the thread stops too instead of
+    blocking on the full buffer, which would leak it in the daemon.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stopped = threading.Event()
+
+    def put(entry):
+        """Queue an entry; returns False once the consumer has gone away"""
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=PREFETCH_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    def consume():
+        try:
+            while True:
+                item, error = buffer.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    return
+                yield item
+        finally:
+            stopped.set()
+
+    items = consume()
+    # A generator dropped before its first item never runs its finally
+    weakref.finalize(items, stopped.set)
+    return items
+
+
+def fetch_concurrently(fetch, items, concurrency=DEFAULT_CONCURRENCY):
+    """Call fetch(item) for every item on a bounded thread pool
+
+    Items are consumed lazily, so this works on streams. Results are yielded
+    in the same order as items, regardless of which request finishes first.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    concurrency = max(1, concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fetch, item))
+            # Keep a window of queued work so workers stay busy while we wait
+            if len(pending) >= concurrency * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def asana_batch(actions, config, concurrency=DEFAULT_CONCURRENCY):
+    """Run actions through Asana's /batch endpoint
+
+    Actions are sent BATCH_SIZE at a time with up to concurrency requests in
+    flight. Yields one result per action, in order; a failed batch request
+    yields an error result for each of its actions.
+    """
+    chunks = [actions[i:i + BATCH_SIZE] for i in range(0, len(actions), BATCH_SIZE)]
+
+    def run_chunk(chunk):
+        try:
+            return asana_request("POST", "batch", config, json={"data": {"actions": chunk}})
+        except Exception:
+            return [{"status_code": None, "body": {"errors": [{"message": "Batch request failed"}]}}] * len(chunk)
+
+    for results in fetch_concurrently(run_chunk, chunks, concurrency):
+        yield from results
+
+
+def batch_error(result):
+    """Return the error message of a failed /batch action, or None if it succeeded"""
+    status = result.get("status_code")
+    if status is not None and 200 <= status < 300:
+        return None
+    errors = (result.get("body") or {}).get("errors") or []
+    return "; ".join(error.get("message", "Unknown error") for error in errors) or f"HTTP {status}"
+
+
+def run_batch_updates(updates, config, concurrency, describe, failed=0):
+    """Apply (task_id, data) updates through /batch and report every result
+
+    describe(task, data) formats the confirmation line for a successful
+    update; the task only carries its name. With --output-format ndjson/json
+    a record of the task ID, name and updated fields is written instead.
+    failed counts tasks the caller already reported and skipped. Aborts if
+    any update failed.
+    """
+    actions = [
+        {"relative_path": f"/tasks/{task_id}", "method": "put", "data": data, "options": {"fields": ["name"]}}
+        for task_id, data in updates
+    ]
+
+    failures = failed
+    applied = []
+    for (task_id, data), result in zip(updates, asana_batch(actions, config, concurrency)):
+        error = batch_error(result)
+        if error:
+            failures += 1
+            click.echo(f"✗ [{task_id}] {error}", err=True)
+            continue
+        applied.append((task_id, {**data, "name": result["body"]["data"].get("name")}))
+        if output.structured():
+            output.emit({"gid": task_id, "name": result["body"]["data"].get("name"), **data})
+        else:
+            click.echo(describe(result["body"]["data"], data))
+    record_task_changes(config, applied)
+
+    if failures:
+        click.echo(f"Error: {failures} of {len(updates) + failed} task(s) failed", err=True)
+        raise click.Abort()
+
+
+def read_task_items(task_ids, from_stdin):
+    """Collect the tasks to act on from arguments and, optionally, stdin
+
+    Each stdin line is either a bare task ID or an NDJSON object with a
+    "task_id" (or "gid") plus per-task fields. Returns a list of dicts.
+    """
+    items = [{"task_id": task_id} for task_id in task_ids]
+
+    if from_stdin:
+        for line_number, line in enumerate(sys.stdin, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    item = json.loads(line)
+                except ValueError as e:
+                    click.echo(f"Error: Invalid JSON on stdin line {line_number}: {e}", err=True)
+                    raise click.Abort()
+                item.setdefault("task_id", item.get("gid"))
+                if not item["task_id"]:
+                    click.echo(f"Error: Missing task_id on stdin line {line_number}", err=True)
+                    raise click.Abort()
+            else:
+                item = {"task_id": line}
+            items.append(item)
+
+    if not items:
+        click.echo("Error: Must specify at least one task ID", err=True)
+        raise click.Abort()
+
+    return items
+
+
+def parse_due_date(date):
+    """Parse YYYY-MM-DD, 'today', 'tomorrow', '+3d' or '+1w' into a date"""
+    if date.lower() == "today":
+        return datetime.now().date()
+    if date.lower() == "tomorrow":
+        return (datetime.now() + timedelta(days=1)).date()
+    if date.startswith("+"):
+        # Parse relative date like +3d or +1w
+        num = int(date[1:-1])
+        unit = date[-1].lower()
+        if unit == "d":
+            return (datetime.now() + timedelta(days=num)).date()
+        if unit == "w":
+            return (datetime.now() + timedelta(weeks=num)).date()
+        raise ValueError(f"Unknown unit: {unit}")
+    # Parse as ISO date
+    return datetime.fromisoformat(date).date()
+
+
+def task_record(task, subtasks=None):
+    """Return the --output-format ndjson/json record of a task, with its subtasks if given"""
+    record = {"gid": task["gid"], "name": task.get("name"), "completed": bool(task.get("completed")),
+              "due_on": task.get("due_on"), "notes": task.get("notes"),
+              "permalink_url": task.get("permalink_url")}
+    if subtasks is not None:
+        record["subtasks"] = [task_record(subtask) for subtask in subtasks]
+    return record
+
+
+def open_task_store(config):
+    """Open the local task cache used by `list`"""
+    # Imported here so commands that don't touch the cache skip loading sqlite3
+    from task_store import TaskStore
+
+    return TaskStore(Path(config.get("cache_path", CACHE_FILE)).expanduser(), config["project_ids"])
+
+
+def record_task_changes(config, changes=(), stale_projects=(), stale_parents=()):
+    """Keep the local task cache in step with changes made through the API
+
+    changes are (task gid, fields) pairs written straight into the cache.
+    stale_projects are synced again, and the cached subtasks of
+    stale_parents fetched again, the next time `list` runs. Does nothing
+    if `list` never created a cache.
+    """
+    if not Path(config.get("cache_path", CACHE_FILE)).expanduser().exists():
+        return
+    store = open_task_store(config)
+    try:
+        if changes:
+            store.update_tasks(changes)
+        if stale_projects:
+            store.mark_projects_stale(stale_projects)
+        if stale_parents:
+            store.invalidate_subtasks(stale_parents)
+    finally:
+        store.close()
+
+
+def sync_task_store(store, config, refresh=False, max_age=DEFAULT_CACHE_MAX_AGE, page_size=DEFAULT_PAGE_SIZE):
+    """Bring the cached tasks of every configured project up to date
+
+    Projects synced less than max_age seconds ago are left alone. The rest
+    get an incremental sync using Asana's modified_since filter, or a full
+    re-download when forced, never synced, or last fully synced more than
+    FULL_SYNC_INTERVAL ago. All project downloads start in parallel.
+    """
+    started_at = time.time()
+    modified_since = (datetime.now(timezone.utc) - MODIFIED_SINCE_SKEW).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    syncs = []
+    for project_id in config["project_ids"]:
+        state = store.project_sync(project_id)
+        full = refresh or state is None or started_at - state["full_synced_at"] > FULL_SYNC_INTERVAL
+        if full:
+            pages = asana_paginate(f"projects/{project_id}/tasks", config,
+                                   params={"opt_fields": TASK_OPT_FIELDS}, page_size=page_size)
+        elif started_at - state["synced_at"] > max_age:
+            pages = asana_paginate("tasks", config, params={
+                "project": project_id,
+                "modified_since": state["modified_since"],
+                "opt_fields": TASK_OPT_FIELDS,
+            }, page_size=page_size)
+        else:
+            continue
+        syncs.append((project_id, full, prefetch(pages)))
+
+    # Pages are written as they arrive, so memory stays flat
+    for project_id, full, pages in syncs:
+        if full:
+            store.replace_project_tasks(project_id, pages)
+        else:
+            store.upsert_project_tasks(project_id, pages)
+        store.mark_project_synced(project_id, started_at, modified_since, full)
+
+
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".md": "markdown", ".markdown": "markdown"}
+
+CHECKLIST_ITEM = re.compile(r"^(\s*)[-*+]\s+(?:\[([ xX])\]\s+)?(.+?)\s*$")
+CHECKLIST_DUE = re.compile(r"\s*\(due:\s*([^)]+)\)$")
+
+
+def load_import_nodes(path, file_format):
+    """Read the tasks to import, in file order
+
+    Each node has a "key" that stays the same between runs (its ref, or its
+    position in the file), a "name", optional "due", "notes" and "completed",
+    and either a "parent_key" (another node) or "parent_id" (an existing
+    Asana task).
+    """
+    nodes = []
+
+    if file_format == "csv":
+        with open(path, newline="") as f:
+            rows = [*csv.DictReader(f)]
+        refs = {row["ref"] for row in rows if row.get("ref")}
+        for number, row in enumerate(rows, 2):
+            node = _import_node(row, row.get("ref") or f"row{number}")
+            parent = (row.get("parent") or "").strip()
+            if parent in refs:
+                node["parent_key"] = parent
+            elif parent:
+                node["parent_id"] = parent
+            nodes.append(node)
+
+    elif file_format == "ndjson":
+        def add(item, key, parent_key):
+            node = _import_node(item, item.get("ref") or key)
+            if parent_key:
+                node["parent_key"] = parent_key
+            elif item.get("parent"):
+                node["parent_id"] = str(item["parent"])
+            nodes.append(node)
+            for index, subtask in enumerate(item.get("subtasks") or [], 1):
+                add(subtask, f"{key}.{index}", node["key"])
+
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    add(json.loads(line), f"line{number}", None)
+
+        # Plain "parent" values may point at refs elsewhere in the file
+        keys = {node["key"] for node in nodes}
+        for node in nodes:
+            if node.get("parent_id") in keys:
+                node["parent_key"] = node.pop("parent_id")
+
+    else:
+        # Markdown checklist: indentation decides nesting
+        stack = []
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                match = CHECKLIST_ITEM.match(line.expandtabs(4))
+                if not match:
+                    continue
+                indent, checked, text = match.groups()
+                due = CHECKLIST_DUE.search(text)
+                node = {
+                    "key": f"line{number}",
+                    "name": CHECKLIST_DUE.sub("", text),
+                    "due": due.group(1).strip() if due else None,
+                    "completed": checked in ("x", "X"),
+                }
+                while stack and stack[-1][0] >= len(indent):
+                    stack.pop()
+                if stack:
+                    node["parent_key"] = stack[-1][1]
+                stack.append((len(indent), node["key"]))
+                nodes.append(node)
+
+    keys = [node["key"] for node in nodes]
+    if len(set(keys)) != len(keys):
+        raise ValueError("duplicate ref values")
+    return nodes
+
+
+def _import_node(item, key):
+    name = (item.get("name") or "").strip()
+    if not name:
+        raise ValueError(f"{key} has no name")
+    completed = item.get("completed")
+    if isinstance(completed, str):
+        completed = completed.strip().lower() in ("1", "true", "yes", "x")
+    return {
+        "key": str(key),
+        "name": name,
+        "due": (item.get("due") or item.get("due_on") or "").strip() or None,
+        "notes": item.get("notes"),
+        "completed": bool(completed),
+    }
+
+
+def import_waves(nodes):
+    """Group nodes by depth so every parent is created before its subtasks
+
+    Sets each node's "depth" and returns a list of waves, top level first.
+    """
+    by_key = {node["key"]: node for node in nodes}
+
+    def depth(node, seen=()):
+        if "depth" not in node:
+            parent = by_key.get(node.get("parent_key"))
+            if parent is None:
+                node["depth"] = 0
+            elif parent["key"] in seen:
+                raise ValueError(f"circular parent reference at {node['key']}")
+            else:
+                node["depth"] = depth(parent, seen + (node["key"],)) + 1
+        return node["depth"]
+
+    waves = []
+    for node in nodes:
+        level = depth(node)
+        while len(waves) <= level:
+            waves.append([])
+        waves[level].append(node)
+    return waves
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, indent=2))
+    tmp_path.replace(path)
+
+
 @click.group()
-def cli():
+@output.options
+@tracing.options
+@click.pass_context
+def cli(ctx, output_format, trace, trace_file):
     """Asana CLI - Manage your personal tasks"""
-    pass
+    tracing.start_for_command(ctx, trace, trace_file)
+    output.start_for_command(ctx, output_format)
 
 
 @cli.command()
 @click.option("--filter", type=click.Choice(["today", "week", "overdue", "all"]), default="all", help="Filter tasks by due date")
 @click.option("--completed", is_flag=True, help="Show completed tasks")
 @click.option("--show-subtasks", is_flag=True, help="Include subtasks in the list")
+@click.option("--concurrency", type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY, show_default=True,
+              help="Maximum parallel requests when fetching subtasks")
+@click.option("--page-size", type=click.IntRange(1, 100), default=DEFAULT_PAGE_SIZE, show_default=True,
+              help="Tasks requested per page")
+@click.option("--refresh", is_flag=True, help="Re-download all tasks into the local cache")
+@click.option("--max-age", type=click.IntRange(min=0),
+              help=f"Seconds before cached tasks are re-synced (default: cache_max_age from config, or {DEFAULT_CACHE_MAX_AGE})")
+@click.option("--no-cache", is_flag=True, help="Fetch tasks live from Asana without using the local cache")
 @click.argument("task_id", required=False)
-def list(filter, completed, show_subtasks, task_id):
+def list(filter, completed, show_subtasks, concurrency, page_size, refresh, max_age, no_cache, task_id):
     """List your tasks or subtasks of a specific task"""
     config = load_config()
 
@@ -92,26 +592,26 @@ def list(filter, completed, show_subtasks, task_id):
     if task_id:
         try:
             parent_task = asana_request("GET", f"tasks/{task_id}", config, params={"opt_fields": "name"})
-            subtasks = asana_request("GET", f"tasks/{task_id}/subtasks", config,
-                                   params={"opt_fields": "name,completed,due_on,notes,gid,permalink_url"})
+            subtask_pages = asana_paginate(f"tasks/{task_id}/subtasks", config,
+                                           params={"opt_fields": SUBTASK_OPT_FIELDS}, page_size=page_size)
+            subtasks = (subtask for page in prefetch(subtask_pages) for subtask in page)
 
-            if not subtasks:
-                click.echo(f"No subtasks found for '{parent_task['name']}'")
+            if output.structured():
+                for subtask in subtasks:
+                    output.emit({**task_record(subtask), "parent_gid": task_id})
                 return
 
-            click.echo(f"Subtasks for '{parent_task['name']}':\n")
+            out = TaskWriter()
+            shown = 0
             for subtask in subtasks:
-                status = "✓" if subtask.get("completed") else "○"
-                due = subtask.get("due_on", "No due date")
-                click.echo(f"  {status} [{subtask['gid']}] {subtask['name']}")
-                click.echo(f"    Due: {due}")
-                if subtask.get("notes"):
-                    notes = subtask["notes"][:100]
-                    if len(subtask["notes"]) > 100:
-                        notes += "..."
-                    click.echo(f"    Notes: {notes}")
-                click.echo(f"    URL: {subtask.get('permalink_url', 'N/A')}")
-                click.echo()
+                if not shown:
+                    out.header(f"Subtasks for '{parent_task['name']}':")
+                shown += 1
+                out.task(subtask)
+            out.flush()
+
+            if not shown:
+                click.echo(f"No subtasks found for '{parent_task['name']}'")
             return
         except Exception as e:
             click.echo(f"Error fetching subtasks: {e}", err=True)
@@ -119,106 +619,166 @@ def list(filter, completed, show_subtasks, task_id):
 
     today = datetime.now().date()
 
-    all_tasks = []
-    sections_by_project = {}
-
-    # Get sections and tasks from all configured projects
-    for project_id in config["project_ids"]:
-        # Get sections for this project
-        sections = asana_request("GET", f"projects/{project_id}/sections", config, params={"opt_fields": "name,gid"})
-        if sections:
-            sections_by_project[project_id] = {s["gid"]: s["name"] for s in sections}
-
-        # Get tasks with memberships
-        params = {
-            "opt_fields": "name,completed,due_on,notes,gid,permalink_url,memberships.section.name,memberships.section.gid"
-        }
-
-        tasks = asana_request("GET", f"projects/{project_id}/tasks", config, params=params)
-
-        if tasks:
-            all_tasks.extend(tasks)
-
-    # If show_subtasks is enabled, fetch subtasks for each task
-    task_subtasks = {}
-    if show_subtasks:
-        for task in all_tasks:
-            try:
-                subtasks = asana_request("GET", f"tasks/{task['gid']}/subtasks", config,
-                                       params={"opt_fields": "name,completed,due_on,notes,gid,permalink_url"})
-                if subtasks:
-                    task_subtasks[task['gid']] = subtasks
-            except Exception:
-                # If we can't get subtasks for a task, just skip it
-                pass
+    def day(offset):
+        return (today + timedelta(days=offset)).isoformat()
+
+    if max_age is None:
+        max_age = int(config.get("cache_max_age", DEFAULT_CACHE_MAX_AGE))
+
+    if no_cache:
+        # Stream tasks with memberships from all configured projects. Every
+        # project starts downloading its first page right away, and later
+        # pages download in the background while earlier ones are filtered
+        # and rendered. Section names come from the task memberships, so no
+        # separate sections request is needed.
+        store = None
+        project_pages = [
+            prefetch(asana_paginate(f"projects/{project_id}/tasks", config,
+                                    params={"opt_fields": TASK_OPT_FIELDS}, page_size=page_size))
+            for project_id in config["project_ids"]
+        ]
+        all_tasks = (task for pages in project_pages for page in pages for task in page)
+    else:
+        # Sync the local mirror (only changed tasks, unless it's time for a
+        # full refresh) and answer from it
+        store = open_task_store(config)
+        with tracing.span("sync cache"):
+            sync_task_store(store, config, refresh=refresh, max_age=max_age, page_size=page_size)
 
     # Filter tasks by completion status
-    filtered_tasks = []
-    for task in all_tasks:
+    def matches_filter(task):
         if task.get("completed", False) != completed:
-            continue
+            return False
 
         due_on = task.get("due_on")
 
         # Apply date filters for non-"all" modes
         if filter == "today":
             if due_on != today.isoformat():
-                continue
+                return False
         elif filter == "week":
             if not due_on:
-                continue
+                return False
             task_date = datetime.fromisoformat(due_on).date()
             if task_date > today + timedelta(days=7):
-                continue
+                return False
         elif filter == "overdue":
             if not due_on:
-                continue
+                return False
             task_date = datetime.fromisoformat(due_on).date()
             if task_date >= today:
-                continue
+                return False
+
+        return True
 
-        filtered_tasks.append(task)
+    if store is None:
+        filtered_tasks = (task for task in all_tasks if matches_filter(task))
+    else:
+        # The store answers date filters as range scans over its due-date index
+        due_from, due_to = {
+            "today": (day(0), day(0)),
+            "week": (None, day(7)),
+            "overdue": (None, day(-1)),
+            "all": (None, None),
+        }[filter]
+
+        def stored_tasks():
+            # Only queried once iterated; "all" groups with its own queries
+            # and only needs this list for subtasks and --output-format output
+            with tracing.span("filter tasks"):
+                tasks = store.query_tasks(config["project_ids"], completed, due_from=due_from, due_to=due_to)
+            yield from tasks
+
+        filtered_tasks = stored_tasks()
+
+    # If show_subtasks is enabled, fetch subtasks for each task that will be
+    # shown, in parallel and in the same order as the tasks stream in.
+    # Subtasks cached less than max_age seconds ago are reused.
+    if show_subtasks:
+        def with_cached_subtasks(tasks):
+            now = time.time()
+            for task in tasks:
+                cached = None
+                if store is not None and not refresh:
+                    synced_at = store.subtasks_synced_at(task['gid'])
+                    if synced_at is not None and now - synced_at <= max_age:
+                        cached = store.get_subtasks(task['gid'])
+                yield task, cached
+
+        def fetch_subtasks(item):
+            task, cached = item
+            if cached is not None:
+                return task, cached, False
+            try:
+                subtask_pages = asana_paginate(f"tasks/{task['gid']}/subtasks", config,
+                                               params={"opt_fields": SUBTASK_OPT_FIELDS}, page_size=page_size)
+                return task, [subtask for page in subtask_pages for subtask in page], True
+            except Exception:
+                # If we can't get subtasks for a task, just skip it
+                return task, None, False
+
+        def store_fetched_subtasks(results):
+            # SQLite writes stay on this thread; workers only talk to Asana
+            for task, subtasks, fetched in results:
+                if fetched and store is not None:
+                    store.replace_subtasks(task['gid'], subtasks)
+                yield task, subtasks
+
+        tasks_with_subtasks = store_fetched_subtasks(
+            fetch_concurrently(fetch_subtasks, with_cached_subtasks(filtered_tasks), concurrency)
+        )
+    else:
+        tasks_with_subtasks = ((task, None) for task in filtered_tasks)
 
-    if not filtered_tasks:
-        click.echo("No tasks found.")
+    if output.structured():
+        # One record per task, streamed in project order with full notes;
+        # the text output's grouping is left to the consumer
+        for task, subtasks in tasks_with_subtasks:
+            output.emit(task_record(task, (subtasks or []) if show_subtasks else None))
         return
 
     # For "all" filter, group by sections if available, otherwise by time periods
     if filter == "all":
-        # Helper function to display a task
-        def display_task(task, indent="  "):
-            status = "✓" if task.get("completed") else "○"
-            due = task.get("due_on", "No due date")
-            click.echo(f"{indent}{status} [{task['gid']}] {task['name']}")
-            click.echo(f"{indent}  Due: {due}")
-            if task.get("notes"):
-                notes = task["notes"][:100]
-                if len(task["notes"]) > 100:
-                    notes += "..."
-                click.echo(f"{indent}  Notes: {notes}")
-            click.echo(f"{indent}  URL: {task.get('permalink_url', 'N/A')}")
-
-            # Display subtasks if available
-            if show_subtasks and task['gid'] in task_subtasks:
-                for subtask in task_subtasks[task['gid']]:
-                    subtask_status = "✓" if subtask.get("completed") else "○"
-                    subtask_due = subtask.get("due_on", "No due date")
-                    click.echo(f"{indent}    ↳ {subtask_status} [{subtask['gid']}] {subtask['name']}")
-                    click.echo(f"{indent}      Due: {subtask_due}")
-                    if subtask.get("notes"):
-                        subtask_notes = subtask["notes"][:80]
-                        if len(subtask["notes"]) > 80:
-                            subtask_notes += "..."
-                        click.echo(f"{indent}      Notes: {subtask_notes}")
-
-            click.echo()
+        task_subtasks = {}
+        if store is None:
+            # Grouping needs every matching task before anything can be printed
+            filtered_tasks = []
+            with tracing.span("collect tasks"):
+                for task, subtasks in tasks_with_subtasks:
+                    filtered_tasks.append(task)
+                    if subtasks:
+                        task_subtasks[task['gid']] = subtasks
+
+            if not filtered_tasks:
+                click.echo("No tasks found.")
+                return
+        elif show_subtasks:
+            # Grouping comes from the store's indexes; only subtasks are needed here
+            with tracing.span("collect subtasks"):
+                for task, subtasks in tasks_with_subtasks:
+                    if subtasks:
+                        task_subtasks[task['gid']] = subtasks
+
+        # Tasks are rendered into large chunks rather than echoed line by line
+        out = TaskWriter()
+
+        def display_task(task):
+            out.task(task, task_subtasks.get(task['gid']))
 
         # Check if we have sections to group by (only for our configured projects)
         # Group by sections only if tasks have sections in our configured projects
         tasks_by_section = {}
         tasks_no_section = []
+        grouping = tracing.span("group tasks")
+
+        if store is not None:
+            # Section -> tasks lookups straight from the store's section index
+            for section_name in store.section_names(config["project_ids"], completed):
+                tasks_by_section[section_name] = store.query_section(config["project_ids"], completed, section_name)
+            if tasks_by_section:
+                tasks_no_section = store.query_section(config["project_ids"], completed, None)
 
-        for task in filtered_tasks:
+        for task in filtered_tasks if store is None else []:
             # Get section from memberships, but only for our configured project_ids
             section_name = None
             memberships = task.get("memberships", [])
@@ -242,17 +802,20 @@ def list(filter, completed, show_subtasks, task_id):
         has_sections = len(tasks_by_section) > 0
 
         if has_sections:
+            grouping.finish()
             # Display tasks grouped by section
-            for section_name in sorted(tasks_by_section.keys()):
-                tasks = tasks_by_section[section_name]
-                click.echo(f"{section_name.upper()} ({len(tasks)}):\n")
-                for task in tasks:
-                    display_task(task)
-
-            if tasks_no_section:
-                click.echo(f"NO SECTION ({len(tasks_no_section)}):\n")
-                for task in tasks_no_section:
-                    display_task(task)
+            with tracing.span("render"):
+                for section_name in sorted(tasks_by_section.keys()):
+                    tasks = tasks_by_section[section_name]
+                    out.header(f"{section_name.upper()} ({len(tasks)}):")
+                    for task in tasks:
+                        display_task(task)
+
+                if tasks_no_section:
+                    out.header(f"NO SECTION ({len(tasks_no_section)}):")
+                    for task in tasks_no_section:
+                        display_task(task)
+                out.flush()
 
         else:
             # Fallback: Group by time periods if no sections
@@ -263,7 +826,20 @@ def list(filter, completed, show_subtasks, task_id):
             later = []
             no_due_date = []
 
-            for task in filtered_tasks:
+            if store is not None:
+                # Each time period is a range scan over the due-date index
+                overdue = store.query_tasks(config["project_ids"], completed, due_to=day(-1))
+                today_tasks = store.query_tasks(config["project_ids"], completed, due_from=day(0), due_to=day(0))
+                this_week = store.query_tasks(config["project_ids"], completed, due_from=day(1), due_to=day(7))
+                next_week = store.query_tasks(config["project_ids"], completed, due_from=day(8), due_to=day(14))
+                later = store.query_tasks(config["project_ids"], completed, due_from=day(15))
+                no_due_date = store.query_tasks(config["project_ids"], completed, no_due_date=True)
+
+                if not (overdue or today_tasks or this_week or next_week or later or no_due_date):
+                    click.echo("No tasks found.")
+                    return
+
+            for task in filtered_tasks if store is None else []:
                 due_on = task.get("due_on")
 
                 if not due_on:
@@ -280,133 +856,116 @@ def list(filter, completed, show_subtasks, task_id):
                         next_week.append(task)
                     else:
                         later.append(task)
-
-            if overdue:
-                click.echo(f"OVERDUE ({len(overdue)}):\n")
-                for task in overdue:
-                    display_task(task)
-
-            if today_tasks:
-                click.echo(f"TODAY ({len(today_tasks)}):\n")
-                for task in today_tasks:
-                    display_task(task)
-
-            if this_week:
-                click.echo(f"THIS WEEK ({len(this_week)}):\n")
-                for task in this_week:
-                    display_task(task)
-
-            if next_week:
-                click.echo(f"NEXT WEEK ({len(next_week)}):\n")
-                for task in next_week:
-                    display_task(task)
-
-            if later:
-                click.echo(f"LATER ({len(later)}):\n")
-                for task in later:
-                    display_task(task)
-
-            if no_due_date:
-                click.echo(f"NO DUE DATE ({len(no_due_date)}):\n")
-                for task in no_due_date:
-                    display_task(task)
+            grouping.finish()
+
+            with tracing.span("render"):
+                periods = [("OVERDUE", overdue), ("TODAY", today_tasks), ("THIS WEEK", this_week),
+                           ("NEXT WEEK", next_week), ("LATER", later), ("NO DUE DATE", no_due_date)]
+                for title, tasks in periods:
+                    if tasks:
+                        out.header(f"{title} ({len(tasks)}):")
+                        for task in tasks:
+                            display_task(task)
+                out.flush()
 
     else:
-        # For other filters, display with header
-        if filter == "today":
-            click.echo(f"Tasks due today ({today.strftime('%Y-%m-%d')}):\n")
-        elif filter == "week":
-            week_end = (today + timedelta(days=7)).isoformat()
-            click.echo(f"Tasks due this week (through {week_end}):\n")
-        elif filter == "overdue":
-            click.echo("Overdue tasks:\n")
-
-        for task in filtered_tasks:
-            status = "✓" if task.get("completed") else "○"
-            due = task.get("due_on", "No due date")
-            click.echo(f"{status} [{task['gid']}] {task['name']}")
-            click.echo(f"  Due: {due}")
-            if task.get("notes"):
-                notes = task["notes"][:100]
-                if len(task["notes"]) > 100:
-                    notes += "..."
-                click.echo(f"  Notes: {notes}")
-            click.echo(f"  URL: {task.get('permalink_url', 'N/A')}")
-
-            # Display subtasks if available
-            if show_subtasks and task['gid'] in task_subtasks:
-                for subtask in task_subtasks[task['gid']]:
-                    subtask_status = "✓" if subtask.get("completed") else "○"
-                    subtask_due = subtask.get("due_on", "No due date")
-                    click.echo(f"    ↳ {subtask_status} [{subtask['gid']}] {subtask['name']}")
-                    click.echo(f"      Due: {subtask_due}")
-                    if subtask.get("notes"):
-                        subtask_notes = subtask["notes"][:80]
-                        if len(subtask["notes"]) > 80:
-                            subtask_notes += "..."
-                        click.echo(f"      Notes: {subtask_notes}")
-
-            click.echo()
+        # For other filters, display with header. Tasks are rendered as they
+        # arrive, so the header waits for the first match.
+        out = TaskWriter()
+        shown = 0
+        for task, subtasks in tasks_with_subtasks:
+            if not shown:
+                if filter == "today":
+                    out.header(f"Tasks due today ({today.strftime('%Y-%m-%d')}):")
+                elif filter == "week":
+                    week_end = (today + timedelta(days=7)).isoformat()
+                    out.header(f"Tasks due this week (through {week_end}):")
+                elif filter == "overdue":
+                    out.header("Overdue tasks:")
+            shown += 1
+            out.task(task, subtasks, indent="")
+        out.flush()
+
+        if not shown:
+            click.echo("No tasks found.")
 
 
 @cli.command()
-@click.argument("task_id")
-def complete(task_id):
-    """Mark a task as complete"""
+@click.argument("task_ids", nargs=-1)
+@click.option("--stdin", "from_stdin", is_flag=True, help=STDIN_TASKS_HELP)
+@click.option("--concurrency", type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY, show_default=True,
+              help="Maximum parallel batch requests")
+def complete(task_ids, from_stdin, concurrency):
+    """Mark one or more tasks as complete
+
+    Several task IDs (or --stdin) are sent through Asana's batch API.
+    """
     config = load_config()
+    items = read_task_items(task_ids, from_stdin)
+
+    if len(items) > 1:
+        updates = [(item["task_id"], {"completed": True}) for item in items]
+        run_batch_updates(updates, config, concurrency, lambda task, data: f"✓ Completed: {task['name']}")
+        return
 
     try:
-        # Mark task as completed
+        # Mark task as completed; the response carries the name for confirmation
         data = {"data": {"completed": True}}
-        asana_request("PUT", f"tasks/{task_id}", config, json=data)
-
-        # Get task name for confirmation
-        task = asana_request("GET", f"tasks/{task_id}", config, params={"opt_fields": "name"})
-        click.echo(f"✓ Completed: {task['name']}")
+        task = asana_request("PUT", f"tasks/{items[0]['task_id']}", config, json=data, params={"opt_fields": "name"})
+        record_task_changes(config, [(items[0]["task_id"], {**data["data"], "name": task["name"]})])
+        if output.structured():
+            output.emit({"gid": items[0]["task_id"], "name": task["name"], "completed": True})
+        else:
+            click.echo(f"✓ Completed: {task['name']}")
     except Exception as e:
         click.echo(f"Error completing task: {e}", err=True)
         raise click.Abort()
 
 
 @cli.command()
-@click.argument("task_id")
+@click.argument("task_ids", nargs=-1)
 @click.argument("date")
-def reschedule(task_id, date):
-    """Change the due date of a task
+@click.option("--stdin", "from_stdin", is_flag=True, help=STDIN_TASKS_HELP)
+@click.option("--concurrency", type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY, show_default=True,
+              help="Maximum parallel batch requests")
+def reschedule(task_ids, date, from_stdin, concurrency):
+    """Change the due date of one or more tasks
 
     DATE can be:
       - YYYY-MM-DD format (e.g., 2025-11-10)
       - Relative: 'today', 'tomorrow', '+3d' (3 days from now), '+1w' (1 week from now)
+
+    NDJSON lines on --stdin may set their own "date".
     """
     config = load_config()
+    items = read_task_items(task_ids, from_stdin)
+
+    if len(items) > 1:
+        updates = []
+        for item in items:
+            try:
+                new_date = parse_due_date(item.get("date", date))
+            except ValueError as e:
+                click.echo(f"Error parsing date for {item['task_id']}: {e}", err=True)
+                raise click.Abort()
+            updates.append((item["task_id"], {"due_on": new_date.isoformat()}))
+
+        run_batch_updates(updates, config, concurrency,
+                          lambda task, data: f"✓ Rescheduled '{task['name']}' to {data['due_on']}")
+        return
 
     # Parse date
     try:
-        if date.lower() == "today":
-            new_date = datetime.now().date()
-        elif date.lower() == "tomorrow":
-            new_date = (datetime.now() + timedelta(days=1)).date()
-        elif date.startswith("+"):
-            # Parse relative date like +3d or +1w
-            num = int(date[1:-1])
-            unit = date[-1].lower()
-            if unit == "d":
-                new_date = (datetime.now() + timedelta(days=num)).date()
-            elif unit == "w":
-                new_date = (datetime.now() + timedelta(weeks=num)).date()
-            else:
-                raise ValueError(f"Unknown unit: {unit}")
-        else:
-            # Parse as ISO date
-            new_date = datetime.fromisoformat(date).date()
+        new_date = parse_due_date(items[0].get("date", date))
 
-        # Update task
+        # Update task; the response carries the name for confirmation
         data = {"data": {"due_on": new_date.isoformat()}}
-        asana_request("PUT", f"tasks/{task_id}", config, json=data)
-
-        # Get task name for confirmation
-        task = asana_request("GET", f"tasks/{task_id}", config, params={"opt_fields": "name"})
-        click.echo(f"✓ Rescheduled '{task['name']}' to {new_date.isoformat()}")
+        task = asana_request("PUT", f"tasks/{items[0]['task_id']}", config, json=data, params={"opt_fields": "name"})
+        record_task_changes(config, [(items[0]["task_id"], {**data["data"], "name": task["name"]})])
+        if output.structured():
+            output.emit({"gid": items[0]["task_id"], "name": task["name"], "due_on": new_date.isoformat()})
+        else:
+            click.echo(f"✓ Rescheduled '{task['name']}' to {new_date.isoformat()}")
     except ValueError as e:
         click.echo(f"Error parsing date: {e}", err=True)
         raise click.Abort()
@@ -416,12 +975,62 @@ def reschedule(task_id, date):
 
 
 @cli.command()
-@click.argument("task_id")
+@click.argument("task_ids", nargs=-1)
 @click.option("--notes", help="Update task notes/description")
 @click.option("--append-notes", help="Append to existing notes")
-def update(task_id, notes, append_notes):
-    """Update a task's properties"""
+@click.option("--stdin", "from_stdin", is_flag=True, help=STDIN_TASKS_HELP)
+@click.option("--concurrency", type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY, show_default=True,
+              help="Maximum parallel batch requests")
+def update(task_ids, notes, append_notes, from_stdin, concurrency):
+    """Update the properties of one or more tasks
+
+    NDJSON lines on --stdin may set their own "notes" or "append_notes".
+    """
     config = load_config()
+    items = read_task_items(task_ids, from_stdin)
+
+    for item in items:
+        item.setdefault("notes", notes)
+        item.setdefault("append_notes", append_notes)
+        if not item["append_notes"] and item["notes"] is None:
+            click.echo("Error: Must specify either --notes or --append-notes", err=True)
+            raise click.Abort()
+
+    if len(items) > 1:
+        # Fetch existing notes for every task we append to, in batches too
+        appending = [item for item in items if item["append_notes"]]
+        reads = [
+            {"relative_path": f"/tasks/{item['task_id']}", "method": "get", "options": {"fields": ["notes"]}}
+            for item in appending
+        ]
+        existing = {}
+        unreadable = 0
+        for item, result in zip(appending, asana_batch(reads, config, concurrency)):
+            error = batch_error(result)
+            if error:
+                click.echo(f"✗ [{item['task_id']}] {error}", err=True)
+                unreadable += 1
+            else:
+                existing[item["task_id"]] = result["body"]["data"].get("notes", "")
+
+        updates = []
+        for item in items:
+            if item["append_notes"]:
+                if item["task_id"] not in existing:
+                    continue  # couldn't read its notes; reported above, the rest still go ahead
+                existing_notes = existing[item["task_id"]]
+                updated_notes = f"{existing_notes}\n{item['append_notes']}" if existing_notes else item["append_notes"]
+            else:
+                updated_notes = item["notes"]
+            updates.append((item["task_id"], {"notes": updated_notes}))
+
+        run_batch_updates(updates, config, concurrency, lambda task, data: f"✓ Updated: {task['name']}",
+                          failed=unreadable)
+        return
+
+    task_id = items[0]["task_id"]
+    notes = items[0]["notes"]
+    append_notes = items[0]["append_notes"]
 
     try:
         # Get current task data if we need to append
@@ -436,18 +1045,16 @@ def update(task_id, notes, append_notes):
                 updated_notes = append_notes
 
             data = {"data": {"notes": updated_notes}}
-        elif notes is not None:
-            data = {"data": {"notes": notes}}
         else:
-            click.echo("Error: Must specify either --notes or --append-notes", err=True)
-            raise click.Abort()
-
-        # Update task
-        asana_request("PUT", f"tasks/{task_id}", config, json=data)
+            data = {"data": {"notes": notes}}
 
-        # Get task name for confirmation
-        task = asana_request("GET", f"tasks/{task_id}", config, params={"opt_fields": "name"})
-        click.echo(f"✓ Updated: {task['name']}")
+        # Update task; the response carries the name for confirmation
+        task = asana_request("PUT", f"tasks/{task_id}", config, json=data, params={"opt_fields": "name"})
+        record_task_changes(config, [(task_id, {**data["data"], "name": task["name"]})])
+        if output.structured():
+            output.emit({"gid": task_id, "name": task["name"], **data["data"]})
+        else:
+            click.echo(f"✓ Updated: {task['name']}")
     except Exception as e:
         click.echo(f"Error updating task: {e}", err=True)
         raise click.Abort()
@@ -486,25 +1093,8 @@ def add(task_name, due, notes, project_index, workspace):
         task_data["notes"] = notes
 
     if due:
-        # Parse due date (reuse logic from reschedule)
         try:
-            if due.lower() == "today":
-                due_date = datetime.now().date()
-            elif due.lower() == "tomorrow":
-                due_date = (datetime.now() + timedelta(days=1)).date()
-            elif due.startswith("+"):
-                num = int(due[1:-1])
-                unit = due[-1].lower()
-                if unit == "d":
-                    due_date = (datetime.now() + timedelta(days=num)).date()
-                elif unit == "w":
-                    due_date = (datetime.now() + timedelta(weeks=num)).date()
-                else:
-                    raise ValueError(f"Unknown unit: {unit}")
-            else:
-                due_date = datetime.fromisoformat(due).date()
-
-            task_data["due_on"] = due_date.isoformat()
+            task_data["due_on"] = parse_due_date(due).isoformat()
         except ValueError as e:
             click.echo(f"Error parsing due date: {e}", err=True)
             raise click.Abort()
@@ -513,6 +1103,10 @@ def add(task_name, due, notes, project_index, workspace):
     try:
         data = {"data": task_data}
         task = asana_request("POST", "tasks", config, json=data)
+        record_task_changes(config, stale_projects=task_data.get("projects", []))
+        if output.structured():
+            output.emit(task_record(task))
+            return
         click.echo(f"✓ Created task: {task['name']}")
         click.echo(f"  ID: {task['gid']}")
         click.echo(f"  URL: {task.get('permalink_url', 'N/A')}")
@@ -530,18 +1124,10 @@ def add_subtask(parent_task_id, subtask_name, due, notes):
     """Add a subtask to an existing task"""
     config = load_config()
 
-    # Get parent task to verify it exists and get workspace
-    try:
-        parent_task = asana_request("GET", f"tasks/{parent_task_id}", config, params={"opt_fields": "name,workspace.gid"})
-    except Exception:
-        click.echo(f"Error: Could not find parent task {parent_task_id}", err=True)
-        raise click.Abort()
-
-    # Prepare subtask data
+    # Prepare subtask data. Creating it under tasks/{parent}/subtasks inherits
+    # the parent's workspace, so the parent doesn't need to be fetched first.
     task_data = {
         "name": subtask_name,
-        "parent": parent_task_id,
-        "workspace": parent_task.get("workspace", {}).get("gid", "10497086658021")
     }
 
     # Set assignee if configured
@@ -552,34 +1138,23 @@ def add_subtask(parent_task_id, subtask_name, due, notes):
         task_data["notes"] = notes
 
     if due:
-        # Parse due date using same logic as add command
         try:
-            if due.lower() == "today":
-                due_date = datetime.now().date()
-            elif due.lower() == "tomorrow":
-                due_date = (datetime.now() + timedelta(days=1)).date()
-            elif due.startswith("+"):
-                num = int(due[1:-1])
-                unit = due[-1].lower()
-                if unit == "d":
-                    due_date = (datetime.now() + timedelta(days=num)).date()
-                elif unit == "w":
-                    due_date = (datetime.now() + timedelta(weeks=num)).date()
-                else:
-                    raise ValueError(f"Unknown unit: {unit}")
-            else:
-                due_date = datetime.fromisoformat(due).date()
-
-            task_data["due_on"] = due_date.isoformat()
+            task_data["due_on"] = parse_due_date(due).isoformat()
         except ValueError as e:
             click.echo(f"Error parsing due date: {e}", err=True)
             raise click.Abort()
 
-    # Create subtask
+    # Create subtask; the response carries the parent name for confirmation
     try:
         data = {"data": task_data}
-        subtask = asana_request("POST", "tasks", config, json=data)
-        click.echo(f"✓ Created subtask under '{parent_task['name']}':")
+        subtask = asana_request("POST", f"tasks/{parent_task_id}/subtasks", config, json=data,
+                                params={"opt_fields": "name,gid,permalink_url,parent.name"})
+        record_task_changes(config, stale_parents=[parent_task_id])
+        if output.structured():
+            output.emit({"gid": subtask["gid"], "name": subtask["name"],
+                         "permalink_url": subtask.get("permalink_url"), "parent_gid": parent_task_id})
+            return
+        click.echo(f"✓ Created subtask under '{subtask['parent']['name']}':")
         click.echo(f"  {subtask['name']}")
         click.echo(f"  ID: {subtask['gid']}")
         click.echo(f"  URL: {subtask.get('permalink_url', 'N/A')}")
@@ -588,5 +1163,129 @@ def add_subtask(parent_task_id, subtask_name, due, notes):
         raise click.Abort()
 
 
+@cli.command("import")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--format", "file_format", type=click.Choice(["csv", "ndjson", "markdown"]),
+              help="Input format (default: from the file extension)")
+@click.option("--project-index", type=int, help="Which project to add top-level tasks to (0-indexed)")
+@click.option("--workspace", default="10497086658021", help="Workspace ID to add top-level tasks to")
+@click.option("--state", "state_file", type=click.Path(dir_okay=False, path_type=Path),
+              help="Resume file recording created tasks (default: FILE.asana-import.json)")
+@click.option("--concurrency", type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY, show_default=True,
+              help="Maximum parallel create requests")
+def import_tasks(file, file_format, project_index, workspace, state_file, concurrency):
+    """Create tasks and nested subtasks from a file
+
+    FILE can be CSV (columns: name, due, notes, ref, parent), NDJSON (objects
+    with the same keys plus optional nested "subtasks") or a Markdown
+    checklist, where indented items become subtasks and a trailing
+    "(due: DATE)" sets the due date. "parent" is either the ref of another
+    row or an existing task ID.
+
+    Every created task is recorded in a resume file, so re-running the same
+    import after a partial failure only creates what is missing.
+    """
+    config = load_config()
+
+    if file_format is None:
+        file_format = IMPORT_FORMATS.get(file.suffix.lower())
+        if file_format is None:
+            click.echo(f"Error: Can't tell the format of {file.name}; use --format", err=True)
+            raise click.Abort()
+
+    if project_index is not None and project_index >= len(config["project_ids"]):
+        click.echo(f"Error: Invalid project index {project_index}. You have {len(config['project_ids'])} projects configured.", err=True)
+        raise click.Abort()
+
+    try:
+        nodes = load_import_nodes(file, file_format)
+        for node in nodes:
+            if node.get("due"):
+                node["due_on"] = parse_due_date(node["due"]).isoformat()
+        waves = import_waves(nodes)
+    except ValueError as e:
+        click.echo(f"Error reading {file.name}: {e}", err=True)
+        raise click.Abort()
+
+    state_file = state_file or file.with_name(file.name + ".asana-import.json")
+    created = json.loads(state_file.read_text()) if state_file.exists() else {}
+    if created and not output.structured():
+        click.echo(f"Resuming import: {len(created)} task(s) already created ({state_file})\n")
+
+    def create(node):
+        task_data = {"name": node["name"]}
+        if "assignee" in config:
+            task_data["assignee"] = config["assignee"]
+        if node.get("notes"):
+            task_data["notes"] = node["notes"]
+        if node.get("due_on"):
+            task_data["due_on"] = node["due_on"]
+        if node.get("completed"):
+            task_data["completed"] = True
+
+        parent_gid = created.get(node["parent_key"]) if node.get("parent_key") else node.get("parent_id")
+        try:
+            if parent_gid:
+                # Subtasks inherit the parent's workspace; no parent lookup needed
+                endpoint = f"tasks/{parent_gid}/subtasks"
+            else:
+                endpoint = "tasks"
+                task_data["workspace"] = workspace
+                if project_index is not None:
+                    task_data["projects"] = [config["project_ids"][project_index]]
+            return node, asana_request("POST", endpoint, config, json={"data": task_data},
+                                       params={"opt_fields": "name,gid"})
+        except Exception:
+            return node, None
+
+    failed = set()
+    skipped = 0
+    # Projects and parent tasks whose cached listings the import makes stale
+    stale_projects = set()
+    stale_parents = set()
+    for wave in waves:
+        pending = []
+        for node in wave:
+            if node["key"] in created:
+                continue
+            if node.get("parent_key") in failed:
+                # Parent couldn't be created, so neither can its subtasks
+                failed.add(node["key"])
+                skipped += 1
+                continue
+            pending.append(node)
+
+        for node, task in fetch_concurrently(create, pending, concurrency):
+            indent = "  " * node["depth"]
+            if task is None:
+                failed.add(node["key"])
+                click.echo(f"{indent}✗ Failed to create: {node['name']}", err=True)
+                continue
+            created[node["key"]] = task["gid"]
+            _write_json_atomic(state_file, created)
+            parent_gid = created.get(node["parent_key"]) if node.get("parent_key") else node.get("parent_id")
+            if parent_gid:
+                stale_parents.add(parent_gid)
+            elif project_index is not None:
+                stale_projects.add(config["project_ids"][project_index])
+            if output.structured():
+                output.emit({"key": node["key"], "gid": task["gid"], "name": task["name"], "parent_gid": parent_gid})
+            else:
+                click.echo(f"{indent}✓ Created: {task['name']} ({task['gid']})")
+    record_task_changes(config, stale_projects=stale_projects, stale_parents=stale_parents)
+
+    if failed:
+        click.echo(f"\nError: {len(failed) - skipped} task(s) failed and {skipped} subtask(s) were skipped. "
+                   f"Re-run the same command to resume.", err=True)
+        raise click.Abort()
+
+    if not output.structured():
+        click.echo(f"\nImported {len(nodes)} task(s) from {file.name}")
+    state_file.unlink(missing_ok=True)
+
+
+cli.add_command(daemon.daemon_commands(cli, Path(__file__)), name="daemon")
+
+
 if __name__ == "__main__":
     cli()
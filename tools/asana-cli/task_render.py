@@ -0,0 +1,71 @@
+"""
+Text rendering of task listings for the Asana CLI
+
+`list` can print thousands of tasks. Each task is formatted into one block
+of text, and blocks are collected by a TaskWriter that hands them to
+click.echo in large chunks, instead of one click.echo (and so one write and
+flush) per line. The output is the same as printing line by line.
+"""
+
+import click
+
+
+# Characters of text collected before they are written to stdout
+CHUNK_SIZE = 64 * 1024
+
+
+class TaskWriter:
+    """Collects rendered text and writes it out in large chunks"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.chunk_size:
+            self.flush()
+
+    def header(self, title):
+        """Write a group heading such as "TODAY (3):" followed by a blank line"""
+        self.write(f"{title}\n\n")
+
+    def task(self, task, subtasks=None, indent="  "):
+        self.write(format_task(task, subtasks, indent))
+
+    def flush(self):
+        if self._parts:
+            click.echo("".join(self._parts), nl=False)
+            self._parts = []
+            self._size = 0
+
+
+def format_task(task, subtasks=None, indent="  "):
+    """Return the lines of a task and its subtasks, ending with a blank line
+
+    Notes are cut to 100 characters for tasks and 80 for subtasks.
+    """
+    status = "✓" if task.get("completed") else "○"
+    lines = [
+        f"{indent}{status} [{task['gid']}] {task['name']}",
+        f"{indent}  Due: {task.get('due_on', 'No due date')}",
+    ]
+    if task.get("notes"):
+        lines.append(f"{indent}  Notes: {_truncate(task['notes'], 100)}")
+    lines.append(f"{indent}  URL: {task.get('permalink_url', 'N/A')}")
+
+    for subtask in subtasks or ():
+        subtask_status = "✓" if subtask.get("completed") else "○"
+        lines.append(f"{indent}    ↳ {subtask_status} [{subtask['gid']}] {subtask['name']}")
+        lines.append(f"{indent}      Due: {subtask.get('due_on', 'No due date')}")
+        if subtask.get("notes"):
+            lines.append(f"{indent}      Notes: {_truncate(subtask['notes'], 80)}")
+
+    lines.append("\n")
+    return "\n".join(lines)
+
+
+def _truncate(text, length):
+    return text[:length] + "..." if len(text) > length else text
@@ -0,0 +1,353 @@
+"""
+Local SQLite mirror of Asana tasks for the Asana CLI
+
+Holds tasks, their section memberships and subtasks for the configured
+projects so that `asana list` can be answered without re-downloading every
+task on every run. asana_cli.py decides when to sync; this module only
+stores and reads.
+"""
+
+import sqlite3
+import time
+
+
+# Bump when SCHEMA or the fields stored in it change; older cache files are
+# rebuilt from scratch
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    project_gid TEXT NOT NULL,
+    gid TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    due_on TEXT,
+    notes TEXT,
+    permalink_url TEXT,
+    modified_at TEXT,
+    -- Section the task is grouped under (see TaskStore.section_projects)
+    section_name TEXT,
+    PRIMARY KEY (project_gid, gid)
+);
+
+CREATE TABLE IF NOT EXISTS memberships (
+    project_gid TEXT NOT NULL,
+    task_gid TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    section_project_gid TEXT,
+    section_gid TEXT,
+    section_name TEXT,
+    PRIMARY KEY (project_gid, task_gid, position)
+);
+
+-- Sorted due-date index: --filter and the time buckets are range scans
+CREATE INDEX IF NOT EXISTS tasks_by_due_on ON tasks (project_gid, completed, due_on);
+
+-- Section -> tasks index used for section grouping
+CREATE INDEX IF NOT EXISTS tasks_by_section ON tasks (project_gid, completed, section_name);
+
+CREATE TABLE IF NOT EXISTS subtasks (
+    parent_gid TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    gid TEXT NOT NULL,
+    name TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    due_on TEXT,
+    notes TEXT,
+    permalink_url TEXT,
+    PRIMARY KEY (parent_gid, position)
+);
+
+CREATE TABLE IF NOT EXISTS subtask_syncs (
+    parent_gid TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS project_syncs (
+    project_gid TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL,
+    modified_since TEXT NOT NULL
+);
+"""
+
+TASK_COLUMNS = ("gid", "name", "completed", "due_on", "notes", "permalink_url")
+
+
+class TaskStore:
+    """SQLite-backed store of tasks, memberships and subtasks
+
+    section_projects are the configured project gids: a task is grouped
+    under the first of its memberships that has a named section in one of
+    them. That section is saved on the task row when the task is written.
+    """
+
+    def __init__(self, path, section_projects=()):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.row_factory = sqlite3.Row
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._drop_all()
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self.section_projects = [*section_projects]
+        key = ",".join(sorted(self.section_projects))
+        row = self.conn.execute("SELECT value FROM settings WHERE key = 'section_projects'").fetchone()
+        if row is None or row["value"] != key:
+            self._assign_sections(key)
+
+    def _drop_all(self):
+        tables = [row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for table in tables:
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def _assign_sections(self, key):
+        """Recompute every task's section after the configured projects changed"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tasks SET section_name = ("
+                "SELECT m.section_name FROM memberships m "
+                "WHERE m.project_gid = tasks.project_gid AND m.task_gid = tasks.gid "
+                f"AND m.section_project_gid IN ({_placeholders(self.section_projects)}) "
+                "AND m.section_name IS NOT NULL AND m.section_name != '' "
+                "ORDER BY m.position LIMIT 1)",
+                self.section_projects,
+            )
+            self.conn.execute("INSERT OR REPLACE INTO settings VALUES ('section_projects', ?)", (key,))
+
+    def close(self):
+        self.conn.close()
+
+    # --- sync bookkeeping -------------------------------------------------
+
+    def project_sync(self, project_gid):
+        """Return the last sync record for a project, or None if never synced"""
+        return self.conn.execute(
+            "SELECT * FROM project_syncs WHERE project_gid = ?", (project_gid,)
+        ).fetchone()
+
+    def mark_project_synced(self, project_gid, started_at, modified_since, full):
+        """Record a finished sync that started at started_at (epoch seconds)"""
+        previous = self.project_sync(project_gid)
+        full_synced_at = started_at if full or previous is None else previous["full_synced_at"]
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO project_syncs VALUES (?, ?, ?, ?)",
+                (project_gid, started_at, full_synced_at, modified_since),
+            )
+
+    # --- tasks --------------------------------------------------------------
+
+    def replace_project_tasks(self, project_gid, pages):
+        """Replace every cached task of a project with the tasks in pages"""
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks WHERE project_gid = ?", (project_gid,))
+            self.conn.execute("DELETE FROM memberships WHERE project_gid = ?", (project_gid,))
+            position = 0
+            for page in pages:
+                for task in page:
+                    self._write_task(project_gid, task, position)
+                    position += 1
+
+    def upsert_project_tasks(self, project_gid, pages):
+        """Insert or update changed tasks of a project; returns the changed gids
+
+        Tasks that are new to the cache are appended after the existing ones,
+        while updated tasks keep their position.
+        """
+        changed = []
+        with self.conn:
+            next_position = self.conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM tasks WHERE project_gid = ?", (project_gid,)
+            ).fetchone()[0]
+            for page in pages:
+                for task in page:
+                    row = self.conn.execute(
+                        "SELECT position FROM tasks WHERE project_gid = ? AND gid = ?", (project_gid, task["gid"])
+                    ).fetchone()
+                    if row is None:
+                        position = next_position
+                        next_position += 1
+                    else:
+                        position = row["position"]
+                    self.conn.execute(
+                        "DELETE FROM memberships WHERE project_gid = ? AND task_gid = ?", (project_gid, task["gid"])
+                    )
+                    self._write_task(project_gid, task, position)
+                    changed.append(task["gid"])
+        return changed
+
+    def update_tasks(self, changes):
+        """Apply (gid, fields) changes made through the API to cached tasks and subtasks
+
+        fields may hold "name", "completed", "due_on" and "notes". A task
+        cached in several projects is updated everywhere.
+        """
+        with self.conn:
+            for gid, fields in changes:
+                columns = [column for column in ("name", "completed", "due_on", "notes") if column in fields]
+                if not columns:
+                    continue
+                values = []
+                for column in columns:
+                    value = fields[column]
+                    if column == "completed":
+                        value = int(bool(value))
+                    elif column == "due_on":
+                        value = value or None
+                    values.append(value)
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                self.conn.execute(f"UPDATE tasks SET {assignments} WHERE gid = ?", (*values, gid))
+                self.conn.execute(f"UPDATE subtasks SET {assignments} WHERE gid = ?", (*values, gid))
+
+    def mark_projects_stale(self, project_gids):
+        """Make the next sync fetch changes of these projects regardless of max_age"""
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE project_syncs SET synced_at = 0 WHERE project_gid IN ({_placeholders(project_gids)})",
+                [*project_gids],
+            )
+
+    def _write_task(self, project_gid, task, position):
+        memberships = task.get("memberships") or []
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                project_gid, task["gid"], position, task.get("name"), int(bool(task.get("completed"))),
+                task.get("due_on") or None, task.get("notes"), task.get("permalink_url"), task.get("modified_at"),
+                self._section_of(memberships),
+            ),
+        )
+        for index, membership in enumerate(memberships):
+            project = membership.get("project") or {}
+            section = membership.get("section") or {}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO memberships VALUES (?, ?, ?, ?, ?, ?)",
+                (project_gid, task["gid"], index, project.get("gid"), section.get("gid"), section.get("name")),
+            )
+
+    def _section_of(self, memberships):
+        for membership in memberships:
+            project = membership.get("project") or {}
+            section = membership.get("section") or {}
+            if project.get("gid") in self.section_projects and section.get("name"):
+                return section["name"]
+        return None
+
+    def query_tasks(self, project_gids, completed, due_from=None, due_to=None, no_due_date=False):
+        """Return tasks with the given completion state, optionally within a due-date range
+
+        due_from and due_to are inclusive ISO dates; no_due_date selects only
+        tasks without a due date. Tasks come back in project then Asana order.
+        """
+        conditions = ["t.completed = ?"]
+        params = [int(completed)]
+        if no_due_date:
+            conditions.append("t.due_on IS NULL")
+        if due_from is not None:
+            conditions.append("t.due_on >= ?")
+            params.append(due_from)
+        if due_to is not None:
+            conditions.append("t.due_on <= ?")
+            params.append(due_to)
+        return self._select_tasks(project_gids, conditions, params)
+
+    def section_names(self, project_gids, completed):
+        """Return the sorted names of sections that tasks are grouped under"""
+        rows = self.conn.execute(
+            "SELECT DISTINCT section_name FROM tasks "
+            f"WHERE project_gid IN ({_placeholders(project_gids)}) AND completed = ? AND section_name IS NOT NULL "
+            "ORDER BY section_name",
+            [*project_gids, int(completed)],
+        )
+        return [row[0] for row in rows]
+
+    def query_section(self, project_gids, completed, section_name):
+        """Return the tasks grouped under a section, or without one if section_name is None"""
+        conditions = ["t.completed = ?"]
+        params = [int(completed)]
+        if section_name is None:
+            conditions.append("t.section_name IS NULL")
+        else:
+            conditions.append("t.section_name = ?")
+            params.append(section_name)
+        return self._select_tasks(project_gids, conditions, params)
+
+    def _select_tasks(self, project_gids, conditions, params):
+        """Return matching tasks with the TASK_COLUMNS fields
+
+        Memberships aren't loaded back: the section a task is grouped under
+        is saved on its row, and nothing else reads them.
+        """
+        # Keep the order of project_gids, then each project's Asana order
+        project_order = " ".join(f"WHEN ? THEN {index}" for index in range(len(project_gids)))
+        sql = (
+            f"SELECT {', '.join('t.' + column for column in TASK_COLUMNS)} FROM tasks t "
+            f"WHERE t.project_gid IN ({_placeholders(project_gids)}) AND {' AND '.join(conditions)} "
+            f"ORDER BY CASE t.project_gid {project_order} END, t.position"
+        )
+        # Plain tuples are much cheaper than sqlite3.Row for large listings
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        tasks = []
+        for row in cursor.execute(sql, [*project_gids, *params, *project_gids]):
+            task = dict(zip(TASK_COLUMNS, row))
+            task["completed"] = bool(task["completed"])
+            tasks.append(task)
+        return tasks
+
+    # --- subtasks ---------------------------------------------------------
+
+    def subtasks_synced_at(self, parent_gid):
+        """Return when the subtasks of a task were last cached, or None"""
+        row = self.conn.execute(
+            "SELECT synced_at FROM subtask_syncs WHERE parent_gid = ?", (parent_gid,)
+        ).fetchone()
+        return row["synced_at"] if row else None
+
+    def get_subtasks(self, parent_gid):
+        """Return the cached subtasks of a task"""
+        rows = self.conn.execute(
+            "SELECT * FROM subtasks WHERE parent_gid = ? ORDER BY position", (parent_gid,)
+        )
+        subtasks = []
+        for row in rows:
+            subtask = {column: row[column] for column in TASK_COLUMNS}
+            subtask["completed"] = bool(subtask["completed"])
+            subtasks.append(subtask)
+        return subtasks
+
+    def invalidate_subtasks(self, parent_gids):
+        """Forget when these tasks' subtasks were cached, so they are fetched again"""
+        with self.conn:
+            self.conn.execute(
+                f"DELETE FROM subtask_syncs WHERE parent_gid IN ({_placeholders(parent_gids)})", [*parent_gids]
+            )
+
+    def replace_subtasks(self, parent_gid, subtasks):
+        """Replace the cached subtasks of a task"""
+        with self.conn:
+            self.conn.execute("DELETE FROM subtasks WHERE parent_gid = ?", (parent_gid,))
+            for position, subtask in enumerate(subtasks):
+                self.conn.execute(
+                    "INSERT INTO subtasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        parent_gid, position, subtask["gid"], subtask.get("name"),
+                        int(bool(subtask.get("completed"))), subtask.get("due_on"),
+                        subtask.get("notes"), subtask.get("permalink_url"),
+                    ),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO subtask_syncs VALUES (?, ?)", (parent_gid, time.time())
+            )
+
+
+def _placeholders(values):
+    return ", ".join("?" for _ in values)
@@ -0,0 +1,32 @@
+"""
+Run the asana or coda CLI against another API base URL and config file
+
+Usage: python launch.py asana|coda BASE_URL CONFIG_FILE [args...]
+
+Used by run.py to point the CLIs at the mock API without touching the
+real config.json; otherwise the command runs exactly as `./asana args...`
+or `./coda args...` would.
+"""
+
+import sys
+from pathlib import Path
+
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+
+API_PATHS = {"asana": ("ASANA_API_BASE", "/api/1.0"), "coda": ("CODA_API_BASE", "/apis/v1")}
+
+
+def main():
+    tool, base_url, config_file, args = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4:]
+    sys.path.insert(0, str(TOOLS_DIR / f"{tool}-cli"))
+    module = __import__(f"{tool}_cli")
+
+    attribute, path = API_PATHS[tool]
+    setattr(module, attribute, base_url + path)
+    module.CONFIG_FILE = Path(config_file)
+    module.cli.main(args, prog_name=tool)
+
+
+if __name__ == "__main__":
+    main()
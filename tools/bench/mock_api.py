@@ -0,0 +1,437 @@
+"""
+Local stand-in for the Asana and Coda APIs, for benchmarks
+
+Serves the endpoints the CLIs use from generated data:
+
+  Asana (/api/1.0)  projects/{id}/tasks, projects/{id}/sections, tasks
+                    (incl. modified_since), tasks/{id}, tasks/{id}/subtasks,
+                    batch
+  Coda (/apis/v1)   whoami, docs, docs/{id}, pages, pages/{id}, page export
+                    and its status, export downloads, tables, columns, rows
+                    (incl. syncToken and query)
+
+Asana responses are trimmed to the fields requested with opt_fields (or a
+batch action's options.fields), so payload sizes and what the CLI can see
+match the real API. MockOptions controls the data sizes, per-request latency, the largest page
+the server will return and how often requests are answered with a 429.
+Every request is counted per endpoint so the benchmark can report how many
+calls a command made.
+
+Run it on its own to poke at it: python mock_api.py [--port 8900]
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+# All generated tasks and rows claim this modification time, so incremental
+# syncs after the first one find nothing new
+MODIFIED_AT = "2026-01-01T00:00:00.000Z"
+
+
+@dataclass
+class MockOptions:
+    projects: int = 2
+    tasks_per_project: int = 100
+    max_subtasks: int = 2            # task i has i % (max_subtasks + 1) subtasks
+    sections: int = 4
+    pages: int = 50
+    tables: int = 2
+    rows: int = 1000
+    export_seconds: float = 0.3      # how long a page export stays "inProgress"
+    export_bytes: int = 20 * 1024    # size of each exported page
+    latency: float = 0.005           # added to every response, in seconds
+    max_page_size: int = 100         # cap on the limit parameter
+    rate_limit_probability: float = 0.0
+    retry_after: float = 0.2
+
+
+def select_fields(resource, fields):
+    """Trim an Asana resource to the requested fields, as opt_fields does
+
+    fields is a comma-separated string or a list; dotted names select
+    nested fields ("memberships.section.name"). gid is always included,
+    and without fields the whole resource is returned.
+    """
+    if not fields:
+        return resource
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    tree = {}
+    for field in fields:
+        node = tree
+        for name in field.strip().split("."):
+            node = node.setdefault(name, {})
+    return _select(resource, tree)
+
+
+def _select(value, tree):
+    if isinstance(value, list):
+        return [_select(item, tree) for item in value]
+    if not isinstance(value, dict) or not tree:
+        return value
+    selected = {"gid": value["gid"]} if "gid" in value else {}
+    for name, subtree in tree.items():
+        if name in value:
+            selected[name] = _select(value[name], subtree)
+    return selected
+
+
+class MockState:
+    """Generated data, pending exports and request counters shared by all handler threads"""
+
+    def __init__(self, options):
+        self.options = options
+        self.random = random.Random(0)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.rate_limited = 0
+        self.exports = {}
+
+        today = date.today()
+        self.project_ids = [str(1000 + project) for project in range(options.projects)]
+        self.tasks = {}
+        self.project_tasks = {}
+        for project_id in self.project_ids:
+            gids = []
+            for i in range(options.tasks_per_project):
+                gid = f"{project_id}{i:06d}"
+                due_offset = i % 30 - 10
+                self.tasks[gid] = {
+                    "gid": gid,
+                    "name": f"Task {i} of project {project_id}",
+                    "completed": i % 7 == 0,
+                    "due_on": (today + timedelta(days=due_offset)).isoformat() if i % 5 else None,
+                    "notes": " ".join(["Notes for this task."] * (i % 12)),
+                    "permalink_url": f"https://app.asana.com/0/{project_id}/{gid}",
+                    "modified_at": MODIFIED_AT,
+                    "memberships": [{"project": {"gid": project_id},
+                                     "section": {"gid": f"{project_id}-s{i % options.sections}",
+                                                 "name": f"Section {i % options.sections}"}}],
+                }
+                gids.append(gid)
+            self.project_tasks[project_id] = gids
+
+        self.pages = [
+            {"id": f"canvas-{i}", "name": f"Page {i}", "type": "page", "contentType": "canvas",
+             "browserLink": f"https://coda.io/d/_dDOC1/_su{i}", "updatedAt": MODIFIED_AT,
+             "parent": {"id": f"canvas-{(i - 1) // 10}"} if i % 10 else None}
+            for i in range(options.pages)
+        ]
+        self.doc = {"id": "DOC1", "name": "Benchmark Doc", "browserLink": "https://coda.io/d/_dDOC1",
+                    "owner": "bench@example.com", "createdAt": MODIFIED_AT, "updatedAt": MODIFIED_AT}
+        self.tables = [{"id": f"grid-{i}", "name": f"Table {i}", "type": "table", "rowCount": options.rows}
+                       for i in range(options.tables)]
+        self.columns = [{"id": f"c-{name.lower()}", "name": name} for name in ("Name", "Status", "Owner", "Points")]
+        self.rows = [
+            {"id": f"i-{i}", "name": f"Row {i}", "index": i, "createdAt": MODIFIED_AT, "updatedAt": MODIFIED_AT,
+             "browserLink": f"https://coda.io/d/_dDOC1#_r{i}",
+             "values": {"c-name": f"Item {i}", "c-status": ("Open", "Done", "Blocked")[i % 3],
+                        "c-owner": f"user{i % 5}@example.com", "c-points": i % 8}}
+            for i in range(options.rows)
+        ]
+
+    def count(self, endpoint):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        """Return (requests per endpoint, number of 429 responses) so far"""
+        with self.lock:
+            return dict(self.counts), self.rate_limited
+
+    def subtasks(self, gid):
+        if gid not in self.tasks:
+            return []
+        parent = self.tasks[gid]
+        index = int(gid[-6:])
+        return [
+            {"gid": f"{gid}{n}", "name": f"Subtask {n} of {parent['name']}", "completed": n == 0,
+             "due_on": parent["due_on"], "notes": "Subtask notes.",
+             "permalink_url": f"https://app.asana.com/0/0/{gid}{n}"}
+            for n in range(index % (self.options.max_subtasks + 1))
+        ]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle's
+    # algorithm and delayed ACKs add ~40 ms to every response
+    disable_nagle_algorithm = True
+    state = None  # set on the subclass made by start()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def _handle(self, method):
+        state = self.state
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        for prefix, api in (("/api/1.0/", "asana"), ("/apis/v1/", "coda"), ("/download/", "download")):
+            if url.path.startswith(prefix):
+                break
+        else:
+            return self._send_json(404, {"message": f"No route for {url.path}"})
+        path = url.path[len(prefix):]
+        endpoint = "/".join("{id}" if re.search(r"\d", segment) else segment for segment in path.split("/"))
+        state.count(f"{api} {method} {endpoint}")
+        time.sleep(state.options.latency)
+
+        # Export downloads come from S3 in real life, which doesn't rate limit like the APIs
+        if api != "download" and state.options.rate_limit_probability and \
+                state.random.random() < state.options.rate_limit_probability:
+            with state.lock:
+                state.rate_limited += 1
+            return self._send_json(429, {"errors": [{"message": "Rate limit exceeded"}]},
+                                   {"Retry-After": f"{state.options.retry_after:g}"})
+
+        if api == "asana":
+            return self._asana(method, path, query, body)
+        if api == "coda":
+            return self._coda(method, path, query, body)
+        self._download(path, query)
+
+    # Asana
+
+    def _asana(self, method, path, query, body):
+        state = self.state
+        parts = path.split("/")
+
+        if parts[0] == "projects" and len(parts) == 3 and parts[2] == "tasks":
+            gids = state.project_tasks.get(parts[1])
+            if gids is None:
+                return self._send_json(404, {"errors": [{"message": "project: Unknown object"}]})
+            return self._asana_page([state.tasks[gid] for gid in gids], query)
+
+        if parts[0] == "projects" and len(parts) == 3 and parts[2] == "sections":
+            sections = [{"gid": f"{parts[1]}-s{i}", "name": f"Section {i}"} for i in range(state.options.sections)]
+            return self._asana_page(sections, query)
+
+        if path == "tasks" and method == "GET":
+            gids = state.project_tasks.get(query.get("project"), [])
+            since = query.get("modified_since", "")
+            return self._asana_page([state.tasks[gid] for gid in gids if state.tasks[gid]["modified_at"] > since],
+                                    query)
+
+        if path == "tasks" and method == "POST":
+            task = self._create_task(body["data"])
+            return self._send_json(201, {"data": select_fields(task, query.get("opt_fields"))})
+
+        if parts[0] == "tasks" and len(parts) == 3 and parts[2] == "subtasks":
+            if method == "POST":
+                task = self._create_task(body["data"], parent=parts[1])
+                return self._send_json(201, {"data": select_fields(task, query.get("opt_fields"))})
+            return self._asana_page(state.subtasks(parts[1]), query)
+
+        if parts[0] == "tasks" and len(parts) == 2:
+            status, task = self._task_action(method.lower(), parts[1], (body or {}).get("data"),
+                                             query.get("opt_fields"))
+            return self._send_json(status, task if status >= 400 else {"data": task})
+
+        if path == "batch" and method == "POST":
+            results = []
+            for action in body["data"]["actions"]:
+                status, result = self._task_action(action["method"], action["relative_path"].split("/")[-1],
+                                                   action.get("data"), action.get("options", {}).get("fields"))
+                results.append({"status_code": status, "headers": {},
+                                "body": result if status >= 400 else {"data": result}})
+            return self._send_json(200, {"data": results})
+
+        self._send_json(404, {"errors": [{"message": f"No route for {method} {path}"}]})
+
+    def _task_action(self, method, gid, data, fields=None):
+        task = self.state.tasks.get(gid)
+        if task is None:
+            return 404, {"errors": [{"message": "task: Unknown object"}]}
+        if method == "put":
+            with self.state.lock:
+                task.update(data or {})
+        return 200, select_fields(dict(task, workspace={"gid": "1"}), fields)
+
+    def _create_task(self, data, parent=None):
+        state = self.state
+        with state.lock:
+            gid = f"9{len(state.tasks):09d}"
+            task = {"gid": gid, "permalink_url": f"https://app.asana.com/0/0/{gid}", "modified_at": MODIFIED_AT,
+                    "completed": False, **data}
+            if parent:
+                task["parent"] = {"gid": parent, "name": state.tasks.get(parent, {}).get("name", "")}
+            state.tasks[gid] = task
+        return task
+
+    def _asana_page(self, items, query):
+        limit = min(int(query.get("limit", self.state.options.max_page_size)), self.state.options.max_page_size)
+        offset = int(query.get("offset") or 0)
+        next_page = {"offset": str(offset + limit)} if offset + limit < len(items) else None
+        page = [select_fields(item, query.get("opt_fields")) for item in items[offset:offset + limit]]
+        self._send_json(200, {"data": page, "next_page": next_page})
+
+    # Coda
+
+    def _coda(self, method, path, query, body):
+        state = self.state
+        parts = path.split("/")
+
+        if path == "whoami":
+            return self._send_json(200, {"name": "Bench", "loginId": "bench@example.com", "type": "user",
+                                         "workspace": {"name": "Bench"}})
+        if path == "docs":
+            return self._coda_page([state.doc], query)
+        if parts[0] != "docs" or len(parts) < 2:
+            return self._send_json(404, {"message": f"No route for {method} {path}"})
+        if len(parts) == 2:
+            return self._send_json(200, state.doc)
+
+        resource = parts[2]
+        if resource == "pages" and len(parts) == 3:
+            if method == "POST":
+                return self._send_json(202, {"id": "canvas-new", "name": body["name"], "requestId": "r1",
+                                             "browserLink": "https://coda.io/d/_dDOC1/_sunew"})
+            return self._coda_page(state.pages, query)
+        if resource == "pages" and len(parts) == 4:
+            page = next((page for page in state.pages if page["id"] == parts[3]), None)
+            if page is None:
+                return self._send_json(404, {"message": "Page not found"})
+            return self._send_json(202 if method == "PUT" else 200, page if method == "GET" else {"id": page["id"]})
+        if resource == "pages" and len(parts) == 5 and parts[4] == "export":
+            with state.lock:
+                export_id = f"export-{len(state.exports)}"
+                state.exports[export_id] = (time.monotonic(), parts[3], body.get("outputFormat", "markdown"))
+            return self._send_json(202, {"id": export_id, "status": "inProgress", "href": ""})
+        if resource == "pages" and len(parts) == 6 and parts[4] == "export":
+            started_at, page_id, output_format = state.exports[parts[5]]
+            if time.monotonic() - started_at < state.options.export_seconds:
+                return self._send_json(200, {"id": parts[5], "status": "inProgress"})
+            host = self.headers.get("Host")
+            return self._send_json(200, {"id": parts[5], "status": "complete",
+                                         "downloadLink": f"http://{host}/download/{page_id}.{output_format}"})
+
+        if resource == "tables" and len(parts) == 3:
+            return self._coda_page(state.tables, query)
+        table = next((table for table in state.tables if len(parts) > 3 and parts[3] in (table["id"], table["name"])),
+                     None)
+        if table is None:
+            return self._send_json(404, {"message": "Table not found"})
+        if len(parts) == 4:
+            return self._send_json(200, dict(table, updatedAt=MODIFIED_AT))
+        if parts[4] == "columns":
+            return self._coda_page(state.columns, query)
+        if parts[4] == "rows":
+            return self._coda_rows(query)
+        self._send_json(404, {"message": f"No route for {method} {path}"})
+
+    def _coda_rows(self, query):
+        state = self.state
+        rows = state.rows
+        if query.get("syncToken"):
+            rows = [row for row in rows if row["updatedAt"] > query["syncToken"]]
+        if query.get("query"):
+            column, _, value = query["query"].partition(":")
+            column = json.loads(column)
+            column_id = next((c["id"] for c in state.columns if column in (c["id"], c["name"])), column)
+            rows = [row for row in rows if str(row["values"].get(column_id)) == str(json.loads(value))]
+        if query.get("useColumnNames") == "true":
+            names = {column["id"]: column["name"] for column in state.columns}
+            rows = [dict(row, values={names[key]: value for key, value in row["values"].items()}) for row in rows]
+        self._coda_page(rows, query, sync_token=MODIFIED_AT)
+
+    def _coda_page(self, items, query, sync_token=None):
+        # Like Coda, later pages are requested by pageToken alone, which carries the original query
+        if query.get("pageToken"):
+            token = json.loads(base64.urlsafe_b64decode(query["pageToken"]))
+            offset, limit = token["offset"], token["limit"]
+        else:
+            offset, limit = 0, int(query.get("limit", self.state.options.max_page_size))
+        limit = min(limit, self.state.options.max_page_size)
+
+        result = {"items": items[offset:offset + limit]}
+        if offset + limit < len(items):
+            token = json.dumps({"offset": offset + limit, "limit": limit}).encode()
+            result["nextPageToken"] = base64.urlsafe_b64encode(token).decode()
+        elif sync_token:
+            result["nextSyncToken"] = sync_token
+        self._send_json(200, result)
+
+    def _download(self, name, query):
+        page_id, _, output_format = name.partition(".")
+        line = f"Content of {page_id}. " * 8 + "\n"
+        content = (f"# {page_id}\n\n" + line * (self.state.options.export_bytes // len(line) + 1)).encode()
+        content = content[:self.state.options.export_bytes]
+        if output_format == "html":
+            content = b"<html><body><pre>" + content + b"</pre></body></html>"
+        headers = {}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self._send(200, content, "text/plain", headers)
+
+    def _send_json(self, status, body, headers=None):
+        self._send(status, json.dumps(body).encode(), "application/json", headers)
+
+    def _send(self, status, content, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def start(options, port=0):
+    """Start a mock server on a background thread; returns (server, state, base URL)"""
+    state = MockState(options)
+    handler = type("BoundMockHandler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the mock Asana/Coda API")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--tasks-per-project", type=int, default=MockOptions.tasks_per_project)
+    parser.add_argument("--pages", type=int, default=MockOptions.pages)
+    parser.add_argument("--rows", type=int, default=MockOptions.rows)
+    parser.add_argument("--latency", type=float, default=MockOptions.latency, help="Seconds added to every response")
+    parser.add_argument("--export-seconds", type=float, default=MockOptions.export_seconds)
+    parser.add_argument("--max-page-size", type=int, default=MockOptions.max_page_size)
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0, help="Fraction of requests answered 429")
+    args = parser.parse_args()
+
+    options = MockOptions(tasks_per_project=args.tasks_per_project, pages=args.pages, rows=args.rows,
+                          latency=args.latency, export_seconds=args.export_seconds,
+                          max_page_size=args.max_page_size, rate_limit_probability=args.rate_limit_probability)
+    server, state, base_url = start(options, args.port)
+    print(f"Asana: {base_url}/api/1.0  Coda: {base_url}/apis/v1  (project IDs: {', '.join(state.project_ids)})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Rendering benchmark for `asana list`
+
+Renders generated tasks (10,000 by default, some with subtasks and long
+notes) the way `asana list` prints them, into a file and into /dev/null:
+
+  line by line   one click.echo per line, as `list` used to print
+  TaskWriter     task_render.py: one text block per task, written in chunks
+
+and checks that both produce the same text. No config or network needed.
+
+Usage: python tools/bench/render.py [--tasks N] [--runs N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(TOOLS_DIR / "asana-cli"))
+from task_render import TaskWriter
+
+# Tasks per group heading, like a section or time period of `list`
+GROUP_SIZE = 500
+
+
+def generate_tasks(count, seed=0):
+    """Return (task, subtasks or None) pairs shaped like `list` gets them from the cache"""
+    rng = random.Random(seed)
+    words = ["launch", "review", "spec", "sync", "draft", "ship", "follow up", "budget", "hiring", "roadmap"]
+
+    def task(gid):
+        return {
+            "gid": str(gid),
+            "name": " ".join(rng.choice(words) for _ in range(rng.randint(2, 6))).capitalize(),
+            "completed": rng.random() < 0.1,
+            "due_on": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if rng.random() < 0.8 else None,
+            "notes": " ".join(rng.choice(words) for _ in range(rng.randint(0, 60))),
+            "permalink_url": f"https://app.asana.com/0/1200000000000000/{gid}",
+        }
+
+    tasks = []
+    for index in range(count):
+        gid = 1210000000000000 + index
+        subtasks = [task(gid * 10 + n) for n in range(rng.randint(1, 3))] if index % 5 == 0 else None
+        tasks.append((task(gid), subtasks))
+    return tasks
+
+
+def echo_lines(tasks):
+    """Print tasks with one click.echo per line"""
+    for index, (task, subtasks) in enumerate(tasks):
+        if index % GROUP_SIZE == 0:
+            click.echo(f"GROUP {index // GROUP_SIZE + 1} ({min(GROUP_SIZE, len(tasks) - index)}):\n")
+        indent = "  "
+        status = "✓" if task.get("completed") else "○"
+        click.echo(f"{indent}{status} [{task['gid']}] {task['name']}")
+        click.echo(f"{indent}  Due: {task.get('due_on', 'No due date')}")
+        if task.get("notes"):
+            notes = task["notes"][:100]
+            if len(task["notes"]) > 100:
+                notes += "..."
+            click.echo(f"{indent}  Notes: {notes}")
+        click.echo(f"{indent}  URL: {task.get('permalink_url', 'N/A')}")
+        for subtask in subtasks or ():
+            subtask_status = "✓" if subtask.get("completed") else "○"
+            click.echo(f"{indent}    ↳ {subtask_status} [{subtask['gid']}] {subtask['name']}")
+            click.echo(f"{indent}      Due: {subtask.get('due_on', 'No due date')}")
+            if subtask.get("notes"):
+                subtask_notes = subtask["notes"][:80]
+                if len(subtask["notes"]) > 80:
+                    subtask_notes += "..."
+                click.echo(f"{indent}      Notes: {subtask_notes}")
+        click.echo()
+
+
+def task_writer(tasks):
+    """Print tasks through task_render.TaskWriter"""
+    out = TaskWriter()
+    for index, (task, subtasks) in enumerate(tasks):
+        if index % GROUP_SIZE == 0:
+            out.header(f"GROUP {index // GROUP_SIZE + 1} ({min(GROUP_SIZE, len(tasks) - index)}):")
+        out.task(task, subtasks)
+    out.flush()
+
+
+RENDERERS = [("line by line", echo_lines), ("TaskWriter", task_writer)]
+
+
+def render_to(path, render, tasks):
+    """Render with sys.stdout pointed at path; returns seconds"""
+    saved = sys.stdout
+    with open(path, "w", encoding="utf-8") as stream:
+        sys.stdout = stream
+        try:
+            started_at = time.perf_counter()
+            render(tasks)
+            stream.flush()
+            return time.perf_counter() - started_at
+        finally:
+            sys.stdout = saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000, help="Tasks to render (default: 10000)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per case (default: 5)")
+    options = parser.parse_args()
+
+    tasks = generate_tasks(options.tasks)
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = {}
+        for label, render in RENDERERS:
+            outputs[label] = Path(tmp) / f"{label}.txt"
+            render_to(outputs[label], render, tasks)
+        texts = {label: path.read_bytes() for label, path in outputs.items()}
+        size = len(next(iter(texts.values())))
+        identical = len(set(texts.values())) == 1
+
+        print(f"{options.tasks} tasks, {size / 1024 / 1024:.1f} MB of text; output identical: "
+              f"{'yes' if identical else 'NO'}")
+        print(f"{'renderer':<14} {'target':<10} {'min':>8} {'median':>8}")
+        for target, path in (("file", Path(tmp) / "out.txt"), ("/dev/null", Path(os.devnull))):
+            for label, render in RENDERERS:
+                timings = [render_to(path, render, tasks) * 1000 for _ in range(options.runs)]
+                print(f"{label:<14} {target:<10} {min(timings):6.0f}ms {statistics.median(timings):6.0f}ms")
+
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the asana and coda CLIs
+
+Starts the mock API (mock_api.py) for each scenario, runs the scripted CLI
+commands against it in fresh processes, and reports per command the wall
+time, the number of API requests it made (and how many were answered with
+a 429) and the peak RSS of the CLI process. No tokens or network needed.
+
+Usage:
+  python3 tools/bench/run.py                      # every scenario
+  python3 tools/bench/run.py asana-5k-subtasks    # just some
+  python3 tools/bench/run.py --list
+  python3 tools/bench/run.py --scale 0.1          # smaller data, quick check
+  python3 tools/bench/run.py --json results.json
+  python3 tools/bench/run.py --baseline results.json   # flag regressions
+
+Scenarios raise the CLIs' rate limits out of the way (the mock answers as
+fast as --latency allows) except where a scenario is about rate limiting.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from mock_api import MockOptions, start
+
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+LAUNCHER = Path(__file__).resolve().parent / "launch.py"
+
+# Quotas high enough that the scheduler never waits on the mock
+UNTHROTTLED = {"read": {"requests": 1_000_000, "per_seconds": 1}, "write": {"requests": 1_000_000, "per_seconds": 1}}
+
+# A step counts as a regression when it's this much slower than the baseline (and at least 0.1 s)
+DEFAULT_TOLERANCE = 0.2
+
+
+@dataclass
+class Step:
+    label: str
+    tool: str
+    args: list
+    stdin: object = None  # None, or a function of the MockState returning the input text
+    expect: str = ""      # text the command's output must contain, or the step fails
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    options: MockOptions
+    steps: list
+    rate_limits: dict = field(default_factory=lambda: UNTHROTTLED)
+
+
+def _task_ids(state, count):
+    """stdin for the bulk commands: the first count task IDs, one per line"""
+    gids = [gid for project_id in state.project_ids for gid in state.project_tasks[project_id]]
+    return "\n".join(gids[:count]) + "\n"
+
+
+SCENARIOS = [
+    Scenario(
+        "asana-5k-subtasks",
+        "5 projects x 1,000 tasks with subtasks: full sync, cached list, subtask fan-out",
+        MockOptions(projects=5, tasks_per_project=1000, max_subtasks=2),
+        [
+            Step("list --refresh", "asana", ["list", "--refresh"]),
+            # The mock's tasks are in sections, so list must group by them
+            Step("list (cached)", "asana", ["list"], expect="SECTION 0 ("),
+            Step("list --filter week (cached)", "asana", ["list", "--filter", "week"]),
+            Step("list --show-subtasks", "asana", ["list", "--show-subtasks"]),
+            Step("list --show-subtasks (cached)", "asana", ["list", "--show-subtasks"]),
+            Step("list --no-cache", "asana", ["list", "--no-cache"], expect="SECTION 0 ("),
+        ],
+    ),
+    Scenario(
+        "asana-bulk-update",
+        "Complete and reschedule 1,000 tasks through /batch",
+        MockOptions(projects=1, tasks_per_project=1000),
+        [
+            Step("reschedule --stdin (1,000)", "asana", ["reschedule", "--stdin", "+1w"],
+                 stdin=lambda state: _task_ids(state, 1000)),
+            Step("complete --stdin (1,000)", "asana", ["complete", "--stdin"],
+                 stdin=lambda state: _task_ids(state, 1000)),
+        ],
+    ),
+    Scenario(
+        "asana-rate-limited",
+        "2 projects x 250 tasks, 5% of requests answered 429 (Retry-After 0.2 s), default quotas",
+        MockOptions(projects=2, tasks_per_project=250, rate_limit_probability=0.05),
+        [
+            Step("list --no-cache", "asana", ["list", "--no-cache"]),
+            Step("list --refresh --show-subtasks", "asana", ["list", "--refresh", "--show-subtasks"]),
+        ],
+        rate_limits={},
+    ),
+    Scenario(
+        "coda-2k-pages",
+        "A doc with 2,000 pages: build the page index, reuse it, resolve pages by name",
+        MockOptions(pages=2000, export_seconds=0.1),
+        [
+            Step("get-doc (cold index)", "coda", ["get-doc", "DOC1"]),
+            Step("get-doc (cached index)", "coda", ["get-doc", "DOC1"]),
+            Step("get-page by name", "coda", ["get-page", "DOC1", "{last_page}"]),
+            Step("get-page-content by name", "coda", ["get-page-content", "DOC1", "{last_page}"]),
+        ],
+    ),
+    Scenario(
+        "coda-slow-exports",
+        "40 pages of 1 MB whose exports take 2 s each",
+        MockOptions(pages=40, export_seconds=2.0, export_bytes=1024 * 1024),
+        [
+            Step("get-page-content", "coda", ["get-page-content", "DOC1", "canvas-1"]),
+            Step("get-page-content (cached)", "coda", ["get-page-content", "DOC1", "canvas-1"]),
+            Step("export-doc (40 pages)", "coda", ["export-doc", "DOC1", "{tmp}/export"]),
+            Step("export-doc (unchanged)", "coda", ["export-doc", "DOC1", "{tmp}/export"]),
+        ],
+    ),
+    Scenario(
+        "coda-20k-rows",
+        "A 20,000-row table: full and incremental sync, local queries, streamed get-table",
+        MockOptions(rows=20000, max_page_size=500),
+        [
+            Step("sync-table (full)", "coda", ["sync-table", "DOC1", "Table 0", "--page-size", "500"]),
+            Step("sync-table (incremental)", "coda", ["sync-table", "DOC1", "Table 0"]),
+            Step("query --where --sort", "coda", ["query", "DOC1", "Table 0", "--where", "Status=Done",
+                                                  "--sort", "Points", "--limit", "50"]),
+            Step("query --group-by", "coda", ["query", "DOC1", "Table 0", "--group-by", "Owner"]),
+            Step("get-table --all --where", "coda", ["get-table", "DOC1", "Table 0", "--all", "--page-size", "500",
+                                                     "--where", "Status=Done"]),
+        ],
+    ),
+]
+
+
+@dataclass
+class Result:
+    scenario: str
+    step: str
+    seconds: float
+    requests: int
+    rate_limited: int
+    peak_rss_mb: float
+    exit_code: int
+    endpoints: dict
+    error: str = ""
+
+
+def tool_python(tool):
+    """Return the tool's venv Python if it has one, else this Python"""
+    python = TOOLS_DIR / f"{tool}-cli" / "venv" / "bin" / "python3"
+    return str(python) if python.exists() else sys.executable
+
+
+def run_step(step, base_url, config_file, tmp_dir, state):
+    """Run one CLI command in a fresh process
+
+    Returns (seconds, exit code, peak RSS in MB, stderr, stdout). stdout is
+    only kept (in a file) for steps that check it, and is "" otherwise.
+    """
+    # {tmp} is the scenario's scratch directory, {last_page} the name of the doc's last page
+    args = [arg.format(tmp=tmp_dir, last_page=state.pages[-1]["name"]) for arg in step.args]
+    command = [tool_python(step.tool), str(LAUNCHER), step.tool, base_url, str(config_file), *args]
+    stdin_file = tmp_dir / "stdin.txt"
+    stdin_file.write_text(step.stdin(state) if step.stdin else "")
+    stdout_file = tmp_dir / "stdout.txt"
+
+    started_at = time.perf_counter()
+    with open(stdin_file) as stdin, open(stdout_file if step.expect else os.devnull, "wb") as stdout:
+        process = subprocess.Popen(command, stdin=stdin, stdout=stdout, stderr=subprocess.PIPE)
+        stderr = process.stderr.read()
+        process.stderr.close()
+        # wait4 (rather than wait) reports the resource usage of this one process
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - started_at
+
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    output = stdout_file.read_text(errors="replace") if step.expect else ""
+    return seconds, process.returncode, peak_rss, stderr.decode(errors="replace"), output
+
+
+def run_scenario(scenario, latency, scale):
+    options = replace(
+        scenario.options,
+        latency=latency,
+        tasks_per_project=max(1, int(scenario.options.tasks_per_project * scale)),
+        pages=max(1, int(scenario.options.pages * scale)),
+        rows=max(1, int(scenario.options.rows * scale)),
+    )
+    server, state, base_url = start(options)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="pm-context-bench-") as tmp:
+            tmp_dir = Path(tmp)
+            config_file = tmp_dir / "config.json"
+            config_file.write_text(json.dumps({
+                "asana": {"api_token": "bench", "project_ids": state.project_ids,
+                          "cache_path": str(tmp_dir / "asana" / "tasks.sqlite3"),
+                          "rate_limits": scenario.rate_limits},
+                "coda": {"api_token": "bench", "cache_dir": str(tmp_dir / "coda"),
+                         "rate_limits": scenario.rate_limits},
+            }))
+
+            for step in scenario.steps:
+                before, rate_limited_before = state.snapshot()
+                seconds, exit_code, peak_rss, stderr, stdout = run_step(step, base_url, config_file, tmp_dir, state)
+                after, rate_limited_after = state.snapshot()
+                endpoints = {endpoint: count - before.get(endpoint, 0) for endpoint, count in after.items()
+                             if count != before.get(endpoint, 0)}
+                error = "" if exit_code == 0 else (stderr.strip().splitlines() or [f"exit code {exit_code}"])[-1]
+                if not error and step.expect not in stdout:
+                    error = f"output doesn't contain {step.expect!r}"
+                results.append(Result(scenario.name, step.label, seconds, sum(endpoints.values()),
+                                      rate_limited_after - rate_limited_before, peak_rss, exit_code, endpoints, error))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def compare(result, baseline, tolerance):
+    """Return a note on how a result differs from its baseline, or "" if it doesn't matter"""
+    if baseline is None:
+        return ""
+    notes = []
+    if result.seconds > baseline["seconds"] * (1 + tolerance) and result.seconds - baseline["seconds"] >= 0.1:
+        notes.append(f"REGRESSION {result.seconds / baseline['seconds'] - 1:+.0%} time")
+    elif result.seconds < baseline["seconds"] * (1 - tolerance) and baseline["seconds"] - result.seconds >= 0.1:
+        notes.append(f"{result.seconds / baseline['seconds'] - 1:+.0%} time")
+    if result.requests - result.rate_limited > baseline["requests"] - baseline["rate_limited"]:
+        notes.append(f"REGRESSION {result.requests - baseline['requests']:+d} requests")
+    return ", ".join(notes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asana and coda CLIs against a local mock API")
+    parser.add_argument("scenarios", nargs="*", help="Scenario names (default: all)")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    parser.add_argument("--latency", type=float, default=5.0, help="Mock API latency per request in ms (default: 5)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply task/page/row counts (default: 1)")
+    parser.add_argument("--verbose", action="store_true", help="Show requests per endpoint for each step")
+    parser.add_argument("--json", dest="json_file", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown against the baseline (default: {DEFAULT_TOLERANCE})")
+    options = parser.parse_args()
+
+    if options.list:
+        for scenario in SCENARIOS:
+            print(f"{scenario.name:<20} {scenario.description}")
+        return
+
+    unknown = set(options.scenarios) - {scenario.name for scenario in SCENARIOS}
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))} (see --list)")
+    scenarios = [scenario for scenario in SCENARIOS if not options.scenarios or scenario.name in options.scenarios]
+
+    baseline = {}
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = {(result["scenario"], result["step"]): result for result in json.load(f)["results"]}
+
+    print(f"{'scenario / step':<52} {'wall':>8} {'requests':>9} {'429s':>5} {'peak RSS':>9}")
+    results = []
+    regressions = 0
+    for scenario in scenarios:
+        print(f"{scenario.name}")
+        for result in run_scenario(scenario, options.latency / 1000, options.scale):
+            results.append(result)
+            note = compare(result, baseline.get((result.scenario, result.step)), options.tolerance)
+            regressions += "REGRESSION" in note
+            if result.error:
+                note = f"FAILED: {result.error}"
+                regressions += 1
+            print(f"  {result.step:<50} {result.seconds:7.2f}s {result.requests:>9} {result.rate_limited:>5} "
+                  f"{result.peak_rss_mb:7.1f}MB  {note}".rstrip())
+            if options.verbose:
+                for endpoint, count in sorted(result.endpoints.items(), key=lambda item: -item[1]):
+                    print(f"      {count:>7}  {endpoint}")
+
+    if options.json_file:
+        with open(options.json_file, "w") as f:
+            json.dump({"latency_ms": options.latency, "scale": options.scale,
+                       "results": [vars(result) for result in results]}, f, indent=2)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the asana and coda CLIs
+
+Times fresh processes the way the ./asana and ./coda wrappers start them
+(through shared/daemon_client.py, with the daemon bypassed):
+
+  asana --help, coda --help   import and command-line parsing only
+  asana list                  answered from the local task cache; needs a
+                              config.json and one earlier `./asana list`
+
+Usage: python tools/bench/startup.py [--runs N] [--importtime]
+
+Each tool runs with its venv's Python when ./venv exists, otherwise with
+the Python running this script. --importtime also prints the slowest
+imports of each case (python -X importtime).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent
+DAEMON_CLIENT = TOOLS_DIR / "shared" / "daemon_client.py"
+
+# (label, tool, arguments)
+CASES = [
+    ("asana --help", "asana", ["--help"]),
+    ("coda --help", "coda", ["--help"]),
+    # A huge --max-age keeps the cached list from syncing, so no network calls are timed
+    ("asana list (cached)", "asana", ["list", "--max-age", str(10 ** 9)]),
+]
+
+
+def tool_command(tool, args, python_flags=()):
+    tool_dir = TOOLS_DIR / f"{tool}-cli"
+    python = tool_dir / "venv" / "bin" / "python3"
+    if not python.exists():
+        python = Path(sys.executable)
+    return [str(python), *python_flags, str(DAEMON_CLIENT), str(tool_dir / f"{tool}_cli.py"), *args]
+
+
+def run_once(command):
+    """Run a command; returns (seconds, returncode, stderr)"""
+    env = {**os.environ, "PM_CLI_NO_DAEMON": "1"}
+    started_at = time.perf_counter()
+    result = subprocess.run(command, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    return time.perf_counter() - started_at, result.returncode, result.stderr.decode(errors="replace")
+
+
+def slowest_imports(command, count=8):
+    """Return the slowest imports (cumulative) of a command as "ms  module" lines"""
+    env = {**os.environ, "PM_CLI_NO_DAEMON": "1"}
+    result = subprocess.run(command, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    imports = []
+    for line in result.stderr.decode(errors="replace").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), module.strip()))
+    imports.sort(reverse=True)
+    return [f"{microseconds / 1000:8.1f} ms  {module}" for microseconds, module in imports[:count]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per case (default: 10)")
+    parser.add_argument("--importtime", action="store_true", help="Also show the slowest imports per case")
+    options = parser.parse_args()
+
+    print(f"{'case':<22} {'min':>8} {'median':>8} {'max':>8}")
+    for label, tool, args in CASES:
+        command = tool_command(tool, args)
+        _, returncode, stderr = run_once(command)  # warm the OS file cache
+        if returncode != 0:
+            reason = stderr.strip().splitlines()[0] if stderr.strip() else f"exit code {returncode}"
+            print(f"{label:<22} skipped: {reason}")
+            continue
+
+        timings = [run_once(command)[0] * 1000 for _ in range(options.runs)]
+        print(f"{label:<22} {min(timings):6.0f}ms {statistics.median(timings):6.0f}ms {max(timings):6.0f}ms")
+        if options.importtime:
+            for line in slowest_imports(tool_command(tool, args, ["-X", "importtime"])):
+                print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,72 @@
 Coda CLI - Read and search Coda docs from the command line
 """
 
+import io
 import json
 import re
+import shutil
 import sys
 import time
+from datetime import datetime
 from pathlib import Path
 
 import click
-import requests
 
 
 # Look for config file in the parent directory (pm-context/)
 SCRIPT_DIR = Path(__file__).parent
 CONFIG_FILE = SCRIPT_DIR.parent.parent / "config.json"
+
+# Shared transport helpers live in tools/shared/
+sys.path.insert(0, str(SCRIPT_DIR.parent / "shared"))
+import daemon
+import http_session
+import output
+import scheduler
+import tracing
+
+from doc_index import DocIndex, normalize_name
+from export_waiter import ExportFailed, ExportResult, ExportTimeout, ExportWaiter
+
+# content_cache, doc_export, table_mirror and table_query are imported by the
+# commands that use them, keeping startup (e.g. --help) fast
+
 CODA_API_BASE = "https://coda.io/apis/v1"
 
+# Local caches (doc indexes, ...) live here unless cache_dir is configured
+CACHE_DIR = SCRIPT_DIR / ".cache"
+
+# Rows per request when paging through a table (the API allows up to 500)
+DEFAULT_ROW_PAGE_SIZE = 200
+
+# Table mirrors are rebuilt from scratch at least this often (seconds) to drop deleted rows
+TABLE_FULL_SYNC_INTERVAL = 24 * 60 * 60
+
+# Export downloads are copied in chunks of this size, never buffered whole
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Pages exported in parallel by export-doc; page export starts count against
+# Coda's write quota, so more workers mostly just queue in the scheduler
+DEFAULT_EXPORT_CONCURRENCY = 4
+
+# Coda's documented quotas: reads 100 per 6 seconds, writes 10 per 6 seconds
+CODA_RATE_LIMITS = {"read": (100, 6), "write": (10, 6)}
+
+
+# Parsed config.json, reused while the file is unchanged (e.g. across daemon commands)
+_config_cache = {}
+
+
+def read_config_file():
+    """Return the parsed config file, re-reading it only when it changes"""
+    stat = CONFIG_FILE.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _config_cache.get("key") != key:
+        with open(CONFIG_FILE) as f:
+            _config_cache["data"] = json.load(f)
+        _config_cache["key"] = key
+    return _config_cache["data"]
+
 
 def load_config():
     """Load configuration from config file"""
@@ -27,11 +78,10 @@ def load_config():
         click.echo(f"See {CONFIG_FILE.parent / 'config.json.example'} for template.", err=True)
         raise click.Abort()
 
-    with open(CONFIG_FILE) as f:
-        full_config = json.load(f)
+    full_config = read_config_file()
 
     # Extract Coda-specific config
-    config = full_config.get("coda", {})
+    config = dict(full_config.get("coda", {}))
 
     if not config.get("api_token"):
         click.echo("Error: coda.api_token not set in config file", err=True)
@@ -40,6 +90,17 @@ def load_config():
     return config
 
 
+def load_local_config():
+    """Load the Coda config for commands that only read local caches
+
+    Only settings like cache_dir are used, so no API token is required,
+    and without a config file the default cache directory applies.
+    """
+    if not CONFIG_FILE.exists():
+        return {}
+    return dict(read_config_file().get("coda", {}))
+
+
 def coda_request(method, endpoint, config, **kwargs):
     """Make an authenticated request to Coda API"""
     headers = {
@@ -49,10 +110,18 @@ def coda_request(method, endpoint, config, **kwargs):
 
     url = f"{CODA_API_BASE}/{endpoint}"
 
+    # Imported here so commands that never hit the network start faster
+    import requests
+
     try:
-        response = requests.request(method, url, headers=headers, **kwargs)
-        response.raise_for_status()
-        return response.json()
+        with tracing.span(f"{method} {tracing.endpoint_template(endpoint)}", "api", endpoint=endpoint) as span:
+            # The scheduler paces requests, honors Retry-After and retries transient errors
+            response = scheduler.get_scheduler("coda", config, CODA_RATE_LIMITS).send(
+                method, lambda: http_session.get_pool(config).request(method, url, headers=headers, **kwargs)
+            )
+            span.set(status=response.status_code, bytes=len(response.content))
+            response.raise_for_status()
+            return response.json()
     except requests.exceptions.HTTPError as e:
         click.echo(f"API Error: {e}", err=True)
         if e.response is not None:
@@ -89,30 +158,361 @@ def extract_doc_id(url_or_id):
 
 def get_all_pages(doc_id, config):
     """Fetch all pages from a doc, handling pagination"""
-    page_items = []
+    return get_all_items(f"docs/{doc_id}/pages", config)
+
+
+def get_all_items(endpoint, config):
+    """Fetch every item of a paginated Coda list endpoint"""
+    with tracing.span(f"paginate {tracing.endpoint_template(endpoint)}") as span:
+        # Not list(): the `list` command below shadows the builtin in this module
+        items = [item for item in iter_items(endpoint, config)]
+        span.set(items=len(items))
+    return items
+
+
+def iter_items(endpoint, config, params=None, page_size=100, max_items=None):
+    """Yield the items of a paginated Coda list endpoint
+
+    Stops after max_items items if given.
+    """
+    if max_items is not None and max_items <= 0:
+        return
+    limit = page_size if max_items is None else min(page_size, max_items)
+    count = 0
+
+    for result in iter_pages(endpoint, config, params, limit):
+        for item in result.get("items", []):
+            yield item
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+
+
+def iter_pages(endpoint, config, params=None, limit=100):
+    """Yield each response page of a paginated Coda list endpoint
+
+    params only go with the first request; later pages are requested by
+    pageToken alone, which carries the original query.
+    """
     next_page_token = None
 
     while True:
-        params = {}
         if next_page_token:
-            params["pageToken"] = next_page_token
+            request_params = {"pageToken": next_page_token}
         else:
-            params["limit"] = 100  # Only use limit on first request
+            # Only use limit on first request
+            request_params = {**(params or {}), "limit": limit}
 
-        pages = coda_request("GET", f"docs/{doc_id}/pages", config, params=params)
-        page_items.extend(pages.get("items", []))
+        result = coda_request("GET", endpoint, config, params=request_params)
+        yield result
 
-        next_page_token = pages.get("nextPageToken")
+        next_page_token = result.get("nextPageToken")
         if not next_page_token:
             break
 
-    return page_items
+
+def get_cache_dir(config):
+    """Return the directory for local caches"""
+    return Path(config.get("cache_dir", CACHE_DIR)).expanduser()
+
+
+def load_doc_index(doc_id, config, doc=None, rebuild=False):
+    """Return the page/table index of a doc
+
+    The cached index is reused while the doc's updatedAt is unchanged, so
+    resolving a page or table costs one doc request instead of paging
+    through every page and table.
+    """
+    if doc is None:
+        doc = coda_request("GET", f"docs/{doc_id}", config)
+
+    path = get_cache_dir(config) / "doc-index" / f"{doc_id}.json"
+    index = None if rebuild else DocIndex.load(path)
+    if index is None or index.updated_at != doc.get("updatedAt"):
+        pages = get_all_pages(doc_id, config)
+        tables = get_all_items(f"docs/{doc_id}/tables", config)
+        index = DocIndex(doc_id, doc.get("updatedAt"), pages, tables, fresh=True)
+        index.save(path)
+    return index
+
+
+def resolve_page(doc_id, page_id_or_name, config):
+    """Find a page by ID or name; returns (page or None, doc index)"""
+    index = load_doc_index(doc_id, config)
+    page = index.find_page(page_id_or_name)
+    if page is None and not index.fresh:
+        # Don't trust a cached miss; the listing may predate the page
+        index = load_doc_index(doc_id, config, rebuild=True)
+        page = index.find_page(page_id_or_name)
+    return page, index
+
+
+def resolve_table(doc_id, table_id_or_name, config):
+    """Find a table by ID or name; returns (table or None, doc index)"""
+    index = load_doc_index(doc_id, config)
+    table = index.find_table(table_id_or_name)
+    if table is None and not index.fresh:
+        index = load_doc_index(doc_id, config, rebuild=True)
+        table = index.find_table(table_id_or_name)
+    return table, index
+
+
+def export_page(doc_id, page_id, output_format, config, waiter=None):
+    """Export a page and wait for it; returns (download link, ExportResult)
+
+    waiter defaults to an ExportWaiter built from the config. Failures and
+    timeouts are reported and abort the command.
+    """
+    if waiter is None:
+        waiter = ExportWaiter.from_config(config)
+    started_at = time.monotonic()
+
+    # Step 1: Initiate export
+    export_request = coda_request(
+        "POST",
+        f"docs/{doc_id}/pages/{page_id}/export",
+        config,
+        json={"outputFormat": output_format}
+    )
+
+    request_id = export_request.get("id")
+    if not request_id:
+        click.echo("Error: Failed to initiate export", err=True)
+        raise click.Abort()
+
+    # Check if download link is already available (fast export)
+    if export_request.get("downloadLink"):
+        result = ExportResult(export_request, time.monotonic() - started_at, 0)
+    else:
+        # Step 2: Poll for completion
+        try:
+            with tracing.span("export polling", page=page_id) as span:
+                result = waiter.wait(
+                    lambda: coda_request("GET", f"docs/{doc_id}/pages/{page_id}/export/{request_id}", config),
+                    started_at=started_at,
+                )
+                span.set(polls=result.polls)
+        except ExportFailed as e:
+            click.echo(f"Error: Export failed - {e}", err=True)
+            raise click.Abort()
+        except ExportTimeout as e:
+            click.echo(f"Error: Export timed out ({e})", err=True)
+            raise click.Abort()
+
+    download_link = result.response.get("downloadLink")
+    if not download_link:
+        click.echo("Error: Export completed but no download link provided", err=True)
+        raise click.Abort()
+    return download_link, result
+
+
+def get_content_cache(config):
+    """Return the cache of exported page content"""
+    from content_cache import ContentCache
+
+    return ContentCache.from_config(config, get_cache_dir(config) / "content")
+
+
+def download_to(url, config, destination, decompress=True):
+    """Stream a download into a binary file in chunks
+
+    With decompress, a gzip/deflate Content-Encoding is decoded on the fly;
+    otherwise the bytes are written as transferred.
+    """
+    with tracing.span("download") as span:
+        response = http_session.get_pool(config).request("GET", url, stream=True)
+        size = 0
+        with response:
+            response.raise_for_status()
+            for chunk in response.raw.stream(DOWNLOAD_CHUNK_SIZE, decode_content=decompress):
+                destination.write(chunk)
+                size += len(chunk)
+        span.set(bytes=size)
+
+
+def write_page_content(doc_id, page, output_format, config, destination, waiter=None, cache=None,
+                       use_cached=True):
+    """Export a page and stream its content into a binary file
+
+    Returns the ExportResult, or None if the content came from the cache.
+    An unchanged page (same updatedAt) is copied from the cache unless
+    use_cached is false; fresh exports are written to the cache as they
+    stream through.
+    """
+    if cache is not None and use_cached:
+        with tracing.span("read content cache", page=page["id"]):
+            # A corrupt entry is dropped here and comes back as a miss
+            cached = cache.open(doc_id, page["id"], output_format, page.get("updatedAt"))
+            if cached is not None:
+                with cached:
+                    shutil.copyfileobj(cached, destination, DOWNLOAD_CHUNK_SIZE)
+        if cached is not None:
+            return None
+
+    download_link, result = export_page(doc_id, page["id"], output_format, config, waiter)
+
+    # S3 pre-signed URL - don't add auth headers
+    if cache is None:
+        download_to(download_link, config, destination)
+    else:
+        with cache.writer(doc_id, page["id"], output_format, page.get("updatedAt")) as cached:
+            download_to(download_link, config, _Tee(destination, cached))
+    return result
+
+
+class _Tee:
+    """Binary file that writes to two files at once"""
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def write(self, data):
+        self.first.write(data)
+        self.second.write(data)
+        return len(data)
+
+
+def require_table(doc_id, table_id_or_name, config):
+    """Find a table by ID or name, or list the available tables and abort"""
+    table, index = resolve_table(doc_id, table_id_or_name, config)
+    if not table:
+        click.echo(f"Error: Table '{table_id_or_name}' not found in doc", err=True)
+        click.echo("\nAvailable tables:", err=True)
+        for table in index.tables:
+            click.echo(f"  - {table['name']} (ID: {table['id']})", err=True)
+        raise click.Abort()
+    return table
+
+
+def row_query(condition):
+    """Turn "Column=value" into the rows API's query parameter ("Column":value)
+
+    Numbers and true/false are sent as JSON literals, anything else as a string.
+    """
+    column, separator, value = condition.partition("=")
+    if not separator or not column.strip():
+        raise click.BadParameter(f"expected COLUMN=VALUE, got '{condition}'", param_hint="'--where'")
+    try:
+        literal = json.loads(value)
+        if not isinstance(literal, (int, float, bool)):
+            literal = value
+    except ValueError:
+        literal = value
+    return f"{json.dumps(column.strip())}:{json.dumps(literal)}"
+
+
+def mirror_path(doc_id, table_id, config):
+    """Return where the local mirror of a table is stored"""
+    return get_cache_dir(config) / "tables" / doc_id / f"{table_id}.json.gz"
+
+
+def load_mirror(doc_id, table_id_or_name, config):
+    """Load a synced table mirror by table ID or name without any API calls, or return None"""
+    from table_mirror import TableMirror
+
+    mirror = TableMirror.load(mirror_path(doc_id, table_id_or_name, config))
+    if mirror is not None:
+        return mirror
+    for table_id, table_name in load_mirror_catalog(doc_id, config).items():
+        if normalize_name(table_name) == normalize_name(table_id_or_name):
+            return TableMirror.load(mirror_path(doc_id, table_id, config))
+    return None
+
+
+def load_mirror_catalog(doc_id, config):
+    """Return table ID -> name for the mirrored tables of a doc"""
+    try:
+        return json.loads((get_cache_dir(config) / "tables" / doc_id / "catalog.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_mirror_catalog(doc_id, catalog, config):
+    path = get_cache_dir(config) / "tables" / doc_id / "catalog.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(catalog, indent=2))
+    tmp_path.replace(path)
+
+
+def sync_table_mirror(doc_id, table, config, full=False, page_size=DEFAULT_ROW_PAGE_SIZE):
+    """Bring the local mirror of a table up to date; returns (mirror, stats)
+
+    Uses the rows API's syncToken to fetch only rows changed since the last
+    sync. Deleted rows don't show up that way, so a full sync runs when the
+    row count no longer matches, once a day, or when full is set.
+    """
+    from table_mirror import TableMirror
+
+    path = mirror_path(doc_id, table["id"], config)
+    mirror = None if full else TableMirror.load(path)
+    now = time.time()
+    if mirror is None or not mirror.sync_token or now - (mirror.full_synced_at or 0) > TABLE_FULL_SYNC_INTERVAL:
+        mirror = TableMirror(doc_id, table["id"])
+        full = True
+    mirror.table_name = table["name"]
+
+    table_endpoint = f"docs/{doc_id}/tables/{table['id']}"
+    mirror.set_columns(get_all_items(f"{table_endpoint}/columns", config))
+
+    if full:
+        mirror.clear()
+        params = {}
+    else:
+        # Changed rows oldest update first, so the latest version of a row wins
+        params = {"syncToken": mirror.sync_token, "sortBy": "updatedAt"}
+
+    sync_token = None
+    inserted = updated = 0
+    for result in iter_pages(f"{table_endpoint}/rows", config, params, page_size):
+        with tracing.span("upsert rows", rows=len(result.get("items", []))):
+            page_inserted, page_updated = mirror.upsert(result.get("items", []))
+        inserted += page_inserted
+        updated += page_updated
+        sync_token = result.get("nextSyncToken") or sync_token
+
+    if not full:
+        row_count = coda_request("GET", table_endpoint, config).get("rowCount")
+        if row_count is not None and row_count != len(mirror):
+            # Rows were deleted since the last sync
+            return sync_table_mirror(doc_id, table, config, full=True, page_size=page_size)
+
+    mirror.sync_token = sync_token
+    mirror.synced_at = now
+    if full:
+        mirror.full_synced_at = now
+    with tracing.span("save mirror", rows=len(mirror)):
+        mirror.save(path)
+
+    # Lets `query` find mirrors by table name offline
+    catalog = load_mirror_catalog(doc_id, config)
+    if catalog.get(table["id"]) != table["name"]:
+        catalog[table["id"]] = table["name"]
+        save_mirror_catalog(doc_id, catalog, config)
+    return mirror, {"full": full, "inserted": inserted, "updated": updated}
+
+
+def require_page(doc_id, page_id_or_name, config):
+    """Find a page by ID or name, or list the available pages and abort"""
+    page, index = resolve_page(doc_id, page_id_or_name, config)
+    if not page:
+        click.echo(f"Error: Page '{page_id_or_name}' not found in doc", err=True)
+        click.echo("\nAvailable pages:", err=True)
+        for page in index.pages:
+            click.echo(f"  - {page['name']} (ID: {page['id']})", err=True)
+        raise click.Abort()
+    return page
 
 
 @click.group()
-def cli():
+@output.options
+@tracing.options
+@click.pass_context
+def cli(ctx, output_format, trace, trace_file):
     """Coda CLI - Read and search Coda docs"""
-    pass
+    tracing.start_for_command(ctx, trace, trace_file)
+    output.start_for_command(ctx, output_format)
 
 
 @cli.command()
@@ -130,6 +530,11 @@ def list(limit, query):
 
     docs = result.get("items", [])
 
+    if output.structured():
+        for doc in docs:
+            output.emit(doc)
+        return
+
     if not docs:
         click.echo("No docs found.")
         return
@@ -155,6 +560,12 @@ def get_doc(doc_url_or_id):
 
     doc_id = extract_doc_id(doc_url_or_id)
 
+    if output.structured():
+        doc = coda_request("GET", f"docs/{doc_id}", config)
+        index = load_doc_index(doc_id, config, doc=doc)
+        output.emit({**doc, "pages": index.pages, "tables": index.tables})
+        return
+
     click.echo(f"Fetching doc: {doc_id}\n")
 
     doc = coda_request("GET", f"docs/{doc_id}", config)
@@ -169,9 +580,11 @@ def get_doc(doc_url_or_id):
     click.echo(f"Updated: {doc.get('updatedAt', 'N/A')}")
     click.echo(f"Published: {doc.get('published', False)}")
 
-    # Get pages (with pagination)
+    # Get pages and tables from the doc index (rebuilt only if the doc changed)
+    index = load_doc_index(doc_id, config, doc=doc)
+
     click.echo("\n--- Pages ---")
-    page_items = get_all_pages(doc_id, config)
+    page_items = index.pages
 
     if page_items:
         for page in page_items:
@@ -181,8 +594,7 @@ def get_doc(doc_url_or_id):
 
     # Get tables
     click.echo("\n--- Tables ---")
-    tables = coda_request("GET", f"docs/{doc_id}/tables", config)
-    table_items = tables.get("items", [])
+    table_items = index.tables
 
     if table_items:
         for table in table_items:
@@ -200,26 +612,16 @@ def get_page(doc_url_or_id, page_id_or_name):
 
     doc_id = extract_doc_id(doc_url_or_id)
 
-    # First, list all pages to find the right one
-    page_items = get_all_pages(doc_id, config)
-
-    # Try to find page by ID or name
-    target_page = None
-    for page in page_items:
-        if page['id'] == page_id_or_name or page['name'].lower() == page_id_or_name.lower():
-            target_page = page
-            break
-
-    if not target_page:
-        click.echo(f"Error: Page '{page_id_or_name}' not found in doc", err=True)
-        click.echo("\nAvailable pages:", err=True)
-        for page in page_items:
-            click.echo(f"  - {page['name']} (ID: {page['id']})", err=True)
-        raise click.Abort()
+    # Find the page by ID or name using the doc index
+    target_page = require_page(doc_id, page_id_or_name, config)
 
     # Get page content
     page = coda_request("GET", f"docs/{doc_id}/pages/{target_page['id']}", config)
 
+    if output.structured():
+        output.emit(page)
+        return
+
     click.echo(f"Page: {page['name']}")
     click.echo(f"ID: {page['id']}")
     click.echo(f"URL: {page.get('browserLink', 'N/A')}")
@@ -234,52 +636,211 @@ def get_page(doc_url_or_id, page_id_or_name):
 @cli.command()
 @click.argument("doc_url_or_id")
 @click.argument("table_id_or_name")
-@click.option("--limit", type=int, default=20, help="Maximum number of rows to return")
-def get_table(doc_url_or_id, table_id_or_name, limit):
+@click.option("--limit", "--max-rows", "max_rows", type=click.IntRange(min=1), default=20,
+              help="Maximum number of rows to return (default: 20)")
+@click.option("--all", "all_rows", is_flag=True, help="Return every row of the table")
+@click.option("--page-size", type=click.IntRange(1, 500), default=DEFAULT_ROW_PAGE_SIZE, show_default=True,
+              help="Rows fetched per API request")
+@click.option("--where", "condition", help="Only rows where COLUMN=VALUE (filtered by the API)")
+@click.option("--columns", help="Comma-separated columns to show (default: all)")
+def get_table(doc_url_or_id, table_id_or_name, max_rows, all_rows, page_size, condition, columns):
     """Get rows from a specific table in a doc"""
     config = load_config()
 
     doc_id = extract_doc_id(doc_url_or_id)
 
-    # First, list all tables to find the right one
-    tables = coda_request("GET", f"docs/{doc_id}/tables", config)
-    table_items = tables.get("items", [])
+    # Find the table by ID or name using the doc index
+    target_table = require_table(doc_id, table_id_or_name, config)
 
-    # Try to find table by ID or name
-    target_table = None
-    for table in table_items:
-        if table['id'] == table_id_or_name or table['name'].lower() == table_id_or_name.lower():
-            target_table = table
-            break
+    # Get table columns (not needed when the caller names them)
+    if columns:
+        column_names = [name.strip() for name in columns.split(",") if name.strip()]
+    else:
+        column_items = get_all_items(f"docs/{doc_id}/tables/{target_table['id']}/columns", config)
+        column_names = [col['name'] for col in column_items]
+
+    structured = output.structured()
+    if not structured:
+        click.echo(f"Table: {target_table['name']}")
+        click.echo(f"ID: {target_table['id']}")
+        click.echo(f"\nColumns:")
+        for name in column_names:
+            click.echo(f"  - {name}")
+
+    # Get table rows, printing each page as it arrives. Values come back
+    # keyed by column name and in simple (plain text/number) form
+    params = {"useColumnNames": "true", "valueFormat": "simple"}
+    if condition:
+        params["query"] = row_query(condition)
+    rows = iter_items(
+        f"docs/{doc_id}/tables/{target_table['id']}/rows", config,
+        params=params, page_size=page_size, max_items=None if all_rows else max_rows,
+    )
+    # Only decode the requested columns
+    wanted = {normalize_name(name) for name in column_names} if columns else None
+
+    if structured:
+        # One record per row, as returned by the API, with only the requested values
+        for row in rows:
+            if wanted is not None:
+                row = {**row, "values": {name: value for name, value in row.get("values", {}).items()
+                                         if normalize_name(name) in wanted}}
+            output.emit(row)
+        return
 
-    if not target_table:
-        click.echo(f"Error: Table '{table_id_or_name}' not found in doc", err=True)
-        click.echo("\nAvailable tables:", err=True)
-        for table in table_items:
-            click.echo(f"  - {table['name']} (ID: {table['id']})", err=True)
+    click.echo(f"\nRows:")
+    count = 0
+    for row in rows:
+        count += 1
+        click.echo(f"\nRow ID: {row['id']}")
+        values = row.get('values', {})
+        for col_name, value in values.items():
+            if wanted is None or normalize_name(col_name) in wanted:
+                click.echo(f"  {col_name}: {value}")
+
+    click.echo(f"\n({count} row(s) shown)")
+
+
+@cli.command("sync-table")
+@click.argument("doc_url_or_id")
+@click.argument("table_id_or_name")
+@click.option("--full", is_flag=True, help="Re-download every row instead of only changed ones")
+@click.option("--page-size", type=click.IntRange(1, 500), default=DEFAULT_ROW_PAGE_SIZE, show_default=True,
+              help="Rows fetched per API request")
+@click.option("--csv", "csv_file", type=click.Path(dir_okay=False, path_type=Path),
+              help="Also write the mirrored table to a CSV file")
+def sync_table(doc_url_or_id, table_id_or_name, full, page_size, csv_file):
+    """Keep a local copy of a table up to date
+
+    The first sync downloads every row; later syncs fetch only rows changed
+    since the previous one. The copy is stored column by column under
+    tools/coda-cli/.cache/tables/.
+    """
+    config = load_config()
+
+    doc_id = extract_doc_id(doc_url_or_id)
+
+    target_table = require_table(doc_id, table_id_or_name, config)
+
+    started = time.monotonic()
+    mirror, stats = sync_table_mirror(doc_id, target_table, config, full=full, page_size=page_size)
+    elapsed = time.monotonic() - started
+
+    if csv_file:
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            mirror.write_csv(f)
+
+    if output.structured():
+        output.emit({
+            "table_id": mirror.table_id, "table_name": mirror.table_name, "rows": len(mirror),
+            "columns": len(mirror.columns), "full": stats["full"], "inserted": stats["inserted"],
+            "updated": stats["updated"], "seconds": round(elapsed, 3),
+            "csv_file": str(csv_file) if csv_file else None,
+        })
+        return
+
+    kind = "full sync" if stats["full"] else "incremental sync"
+    click.echo(
+        f"Synced table '{mirror.table_name}' ({mirror.table_id}): {len(mirror)} row(s), "
+        f"{len(mirror.columns)} column(s)"
+    )
+    click.echo(
+        f"  {kind}: {stats['inserted']} new, {stats['updated']} updated in {elapsed:.2f} s"
+    )
+
+    if csv_file:
+        click.echo(f"  Wrote {csv_file}")
+
+
+@cli.command()
+@click.argument("doc_url_or_id")
+@click.argument("table_id_or_name")
+@click.option("--where", "conditions", multiple=True,
+              help="Filter rows, e.g. Status=Done, Points>=3, Owner!=me, Name~launch (contains); repeatable")
+@click.option("--columns", help="Comma-separated columns to show (default: all)")
+@click.option("--sort", "sort_by", help="Column to sort by")
+@click.option("--desc", is_flag=True, help="Sort in descending order")
+@click.option("--group-by", help="Count rows per value of this column")
+@click.option("--count", "count_only", is_flag=True, help="Only print the number of matching rows")
+@click.option("--limit", type=click.IntRange(min=1), help="Maximum number of rows to show")
+def query(doc_url_or_id, table_id_or_name, conditions, columns, sort_by, desc, group_by, count_only, limit):
+    """Query a locally synced table without calling the API
+
+    Run `sync-table` first to create or refresh the local copy.
+    """
+    from table_query import QueryError, filter_positions, group_counts, parse_condition, project, sort_positions
+
+    # Runs entirely on the local mirror, so it works without an API token
+    config = load_local_config()
+
+    doc_id = extract_doc_id(doc_url_or_id)
+
+    with tracing.span("load mirror"):
+        mirror = load_mirror(doc_id, table_id_or_name, config)
+    if mirror is None:
+        click.echo(f"Error: Table '{table_id_or_name}' has not been synced for this doc", err=True)
+        click.echo(f"Run: ./coda sync-table {doc_url_or_id} \"{table_id_or_name}\"", err=True)
+        raise click.Abort()
+
+    try:
+        with tracing.span("filter rows", rows=len(mirror)) as span:
+            positions = filter_positions(mirror, [parse_condition(condition) for condition in conditions])
+            span.set(matched=len(positions))
+
+        if count_only:
+            if output.structured():
+                output.emit({"count": len(positions)})
+            else:
+                click.echo(len(positions))
+            return
+
+        if group_by:
+            with tracing.span("group rows"):
+                groups = group_counts(mirror, positions, group_by)
+            for value, count in groups:
+                if output.structured():
+                    output.emit({"value": value, "count": count})
+                else:
+                    click.echo(f"{count:>7}  {'(empty)' if value in (None, '') else value}")
+            return
+
+        if sort_by:
+            with tracing.span("sort rows"):
+                positions = sort_positions(mirror, positions, sort_by, descending=desc)
+        matched = len(positions)
+        if limit:
+            positions = positions[:limit]
+
+        names = [name.strip() for name in columns.split(",")] if columns else \
+            [column["name"] for column in mirror.columns]
+        with tracing.span("project columns"):
+            header, rows = project(mirror, positions, names)
+    except QueryError as e:
+        click.echo(f"Error: {e}", err=True)
         raise click.Abort()
 
-    # Get table columns
-    columns = coda_request("GET", f"docs/{doc_id}/tables/{target_table['id']}/columns", config)
-    column_items = columns.get("items", [])
+    if output.structured():
+        # Full values, not the text table's truncated cells
+        for row in rows:
+            output.emit(dict(zip(header, row)))
+        return
 
-    click.echo(f"Table: {target_table['name']}")
-    click.echo(f"ID: {target_table['id']}")
-    click.echo(f"\nColumns:")
-    for col in column_items:
-        click.echo(f"  - {col['name']}")
+    print_rows(header, rows)
+    click.echo(f"\n({len(rows)} of {matched} matching row(s); {len(mirror)} in table, synced "
+               f"{datetime.fromtimestamp(mirror.synced_at).strftime('%Y-%m-%d %H:%M')})")
 
-    # Get table rows
-    params = {"limit": limit}
-    rows = coda_request("GET", f"docs/{doc_id}/tables/{target_table['id']}/rows", config, params=params)
-    row_items = rows.get("items", [])
 
-    click.echo(f"\nRows (showing {len(row_items)}):")
-    for row in row_items:
-        click.echo(f"\nRow ID: {row['id']}")
-        values = row.get('values', {})
-        for col_name, value in values.items():
-            click.echo(f"  {col_name}: {value}")
+def print_rows(header, rows, max_width=40):
+    """Print rows as an aligned text table"""
+    from table_query import format_cell
+
+    with tracing.span("render", rows=len(rows)):
+        cells = [[format_cell(value, max_width) for value in row] for row in rows]
+        widths = [max([len(name), *(len(row[i]) for row in cells)]) for i, name in enumerate(header)]
+        click.echo("  ".join(name.ljust(width) for name, width in zip(header, widths)).rstrip())
+        click.echo("  ".join("-" * width for width in widths))
+        for row in cells:
+            click.echo("  ".join(text.ljust(width) for text, width in zip(row, widths)).rstrip())
 
 
 @cli.command()
@@ -289,6 +850,10 @@ def whoami():
 
     user = coda_request("GET", "whoami", config)
 
+    if output.structured():
+        output.emit(user)
+        return
+
     click.echo(f"Name: {user.get('name', 'N/A')}")
     click.echo(f"Login ID: {user.get('loginId', 'N/A')}")
     click.echo(f"Type: {user.get('type', 'N/A')}")
@@ -299,7 +864,14 @@ def whoami():
 @click.argument("doc_url_or_id")
 @click.argument("page_id_or_name")
 @click.option("--format", "output_format", type=click.Choice(["markdown", "html"]), default="markdown", help="Output format")
-def get_page_content(doc_url_or_id, page_id_or_name, output_format):
+@click.option("--timeout", type=float, help="Give up if the export takes longer than this many seconds (default: 120)")
+@click.option("--no-cache", is_flag=True, help="Export again even if the page is unchanged since it was last cached")
+@click.option("--output", "-o", "output_file", type=click.Path(dir_okay=False, path_type=Path),
+              help="Write the content to a file instead of stdout")
+@click.option("--decompress/--no-decompress", default=True,
+              help="Decode compressed downloads on the fly (default); --no-decompress writes them as transferred "
+                   "and bypasses the content cache")
+def get_page_content(doc_url_or_id, page_id_or_name, output_format, timeout, no_cache, output_file, decompress):
     """Export and display the content of a page
 
     This uses the Coda API's async export feature to retrieve page content
@@ -310,95 +882,170 @@ def get_page_content(doc_url_or_id, page_id_or_name, output_format):
     doc_id = extract_doc_id(doc_url_or_id)
 
     # First, find the page ID if a name was provided
-    page_items = get_all_pages(doc_id, config)
-
-    target_page = None
-    for page in page_items:
-        if page['id'] == page_id_or_name or page['name'].lower() == page_id_or_name.lower():
-            target_page = page
-            break
-
-    if not target_page:
-        click.echo(f"Error: Page '{page_id_or_name}' not found in doc", err=True)
-        click.echo("\nAvailable pages:", err=True)
-        for page in page_items:
-            click.echo(f"  - {page['name']} (ID: {page['id']})", err=True)
-        raise click.Abort()
+    target_page = require_page(doc_id, page_id_or_name, config)
 
     page_id = target_page['id']
+    structured = output.structured()
 
-    click.echo(f"Exporting page '{target_page['name']}' as {output_format}...\n")
-
-    # Step 1: Initiate export
-    export_request = coda_request(
-        "POST",
-        f"docs/{doc_id}/pages/{page_id}/export",
-        config,
-        json={"outputFormat": output_format}
-    )
-
-    request_id = export_request.get("id")
-    status = export_request.get("status")
-    download_link = export_request.get("downloadLink")
+    if not structured:
+        click.echo(f"Exporting page '{target_page['name']}' as {output_format}...\n")
 
-    if not request_id:
-        click.echo("Error: Failed to initiate export", err=True)
-        raise click.Abort()
+    waiter = ExportWaiter.from_config(config, deadline=timeout)
+    # Content is streamed in chunks, so large exports never sit in memory whole
+    if decompress:
+        cache = get_content_cache(config)
 
-    # Check if download link is already available (fast export)
-    if download_link:
-        # S3 pre-signed URL - don't add auth headers
-        content_response = requests.get(download_link)
-        content_response.raise_for_status()
-        click.echo(content_response.text)
-        return
+        def write(destination):
+            # --no-cache skips the lookup but still refreshes the cached copy
+            return write_page_content(
+                doc_id, target_page, output_format, config, destination, waiter, cache, use_cached=not no_cache
+            )
+    else:
+        download_link, export_result = export_page(doc_id, page_id, output_format, config, waiter)
 
-    # Step 2: Poll for completion
-    max_attempts = 60
-    attempt = 0
+        def write(destination):
+            download_to(download_link, config, destination, decompress=False)
+            return export_result
 
-    while attempt < max_attempts:
+    if output_file:
+        tmp_path = output_file.with_name(output_file.name + ".tmp")
         try:
-            status_response = coda_request(
-                "GET",
-                f"docs/{doc_id}/pages/{page_id}/export/{request_id}",
-                config
-            )
-        except Exception as e:
-            # If polling fails, wait a bit and try again
-            if attempt < max_attempts - 1:
-                attempt += 1
-                time.sleep(0.5)
-                continue
-            else:
-                raise
-
-        status = status_response.get("status")
+            with open(tmp_path, "wb") as destination:
+                result = write(destination)
+            tmp_path.replace(output_file)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        click.echo(f"Wrote {output_file.stat().st_size} bytes to {output_file}", err=True)
+    elif structured:
+        # The content goes into the record, so it has to be collected first
+        content = io.BytesIO()
+        result = write(content)
+    else:
+        stdout = click.get_binary_stream("stdout")
+        result = write(stdout)
+        stdout.write(b"\n")
+        stdout.flush()
 
-        if status == "complete":
-            download_link = status_response.get("downloadLink")
-            if not download_link:
-                click.echo("Error: Export completed but no download link provided", err=True)
-                raise click.Abort()
+    if result is None:
+        click.echo(f"Served from cache (page unchanged since {target_page.get('updatedAt')})", err=True)
+    else:
+        click.echo(f"Export took {result.seconds:.2f} s ({result.polls} status poll(s))", err=True)
 
-            # Step 3: Download the content (S3 pre-signed URL - no auth needed)
-            content_response = requests.get(download_link)
-            content_response.raise_for_status()
+    if structured:
+        record = {"page_id": page_id, "name": target_page["name"], "format": output_format,
+                  "cached": result is None, "seconds": None if result is None else round(result.seconds, 3)}
+        if output_file:
+            record["output_file"] = str(output_file)
+        else:
+            record["content"] = content.getvalue().decode("utf-8", errors="replace")
+        output.emit(record)
 
-            click.echo(content_response.text)
-            return
 
-        elif status == "failed":
-            error_msg = status_response.get("error", "Unknown error")
-            click.echo(f"Error: Export failed - {error_msg}", err=True)
-            raise click.Abort()
+@cli.command("export-doc")
+@click.argument("doc_url_or_id")
+@click.argument("output_dir", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--format", "output_format", type=click.Choice(["markdown", "html"]), default="markdown", help="Output format")
+@click.option("--concurrency", type=click.IntRange(1, 32), default=DEFAULT_EXPORT_CONCURRENCY, show_default=True,
+              help="Number of pages to export in parallel")
+@click.option("--timeout", type=float, help="Per-page export timeout in seconds (default: 120)")
+@click.option("--force", is_flag=True, help="Re-export every page, even if unchanged since the last run")
+def export_doc(doc_url_or_id, output_dir, output_format, concurrency, timeout, force):
+    """Export every page of a doc into a directory tree
+
+    Subpages are written under a directory named after their parent page.
+    Pages whose updatedAt hasn't changed since the last export into
+    OUTPUT_DIR are skipped.
+    """
+    from doc_export import load_manifest, page_paths, save_manifest
 
-        # Still in progress
-        attempt += 1
-        time.sleep(0.5)  # Wait 0.5 seconds before polling again
+    config = load_config()
 
-    click.echo("Error: Export timed out", err=True)
-    raise click.Abort()
+    doc_id = extract_doc_id(doc_url_or_id)
+    pages = load_doc_index(doc_id, config).pages
+    paths = page_paths(pages, output_format)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest(output_dir)
+    if previous.get("doc_id") != doc_id or previous.get("format") != output_format:
+        previous = {"pages": {}}
+
+    manifest = {"doc_id": doc_id, "format": output_format, "pages": {}}
+    to_export = []
+    for page in pages:
+        entry = previous["pages"].get(page["id"])
+        unchanged = (
+            not force and entry is not None and page.get("updatedAt")
+            and entry["updatedAt"] == page["updatedAt"] and entry["path"] == paths[page["id"]]
+            and (output_dir / entry["path"]).exists()
+        )
+        if unchanged:
+            manifest["pages"][page["id"]] = entry
+        else:
+            to_export.append(page)
+
+    structured = output.structured()
+    if not structured:
+        click.echo(
+            f"Exporting {len(to_export)} of {len(pages)} page(s) as {output_format} "
+            f"({len(pages) - len(to_export)} unchanged)...\n"
+        )
+
+    waiter = ExportWaiter.from_config(config, deadline=timeout)
+    cache = None if force else get_content_cache(config)
+
+    def export_one(page):
+        path = output_dir / paths[page["id"]]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as destination, tracing.span("export page", page=page["id"]):
+                result = write_page_content(doc_id, page, output_format, config, destination, waiter, cache)
+            tmp_path.replace(path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return result
+
+    import requests
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    started = time.monotonic()
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(export_one, page): page for page in to_export}
+            for future in as_completed(futures):
+                page = futures[future]
+                try:
+                    result = future.result()
+                except (click.Abort, requests.exceptions.RequestException, OSError) as e:
+                    # e.g. a full disk or a page title the filesystem rejects; the other pages go on
+                    failed += 1
+                    reason = f" ({e})" if str(e) else ""
+                    click.echo(f"✗ {page['name']} (ID: {page['id']}){reason}", err=True)
+                    continue
+                manifest["pages"][page["id"]] = {"updatedAt": page.get("updatedAt"), "path": paths[page["id"]]}
+                if structured:
+                    output.emit({"page_id": page["id"], "name": page["name"], "path": paths[page["id"]],
+                                 "cached": result is None,
+                                 "seconds": None if result is None else round(result.seconds, 3)})
+                    continue
+                took = "cached" if result is None else f"{result.seconds:.1f} s"
+                click.echo(f"✓ {paths[page['id']]} ({took})")
+    finally:
+        # Remove files of pages that were deleted or moved, then record what's on disk
+        current_paths = {entry["path"] for entry in manifest["pages"].values()} | set(paths.values())
+        for entry in previous["pages"].values():
+            if entry["path"] not in current_paths:
+                (output_dir / entry["path"]).unlink(missing_ok=True)
+        save_manifest(output_dir, manifest)
+
+    if not structured:
+        click.echo(
+            f"\nExported {len(to_export) - failed} page(s) to {output_dir} in {time.monotonic() - started:.1f} s"
+            + (f", {failed} failed" if failed else "")
+        )
+    if failed:
+        raise click.Abort()
 
 
 @cli.command()
@@ -433,13 +1080,7 @@ def create_page(doc_url_or_id, page_name, content, content_format, subtitle, par
 
     # If parent is specified, resolve it to a page ID
     if parent:
-        page_items = get_all_pages(doc_id, config)
-
-        parent_page = None
-        for page in page_items:
-            if page['id'] == parent or page['name'].lower() == parent.lower():
-                parent_page = page
-                break
+        parent_page, _ = resolve_page(doc_id, parent, config)
 
         if not parent_page:
             click.echo(f"Error: Parent page '{parent}' not found in doc", err=True)
@@ -457,10 +1098,15 @@ def create_page(doc_url_or_id, page_name, content, content_format, subtitle, par
             }
         }
 
-    click.echo(f"Creating page '{page_name}' in doc {doc_id}...")
+    if not output.structured():
+        click.echo(f"Creating page '{page_name}' in doc {doc_id}...")
 
     result = coda_request("POST", f"docs/{doc_id}/pages", config, json=payload)
 
+    if output.structured():
+        output.emit(result)
+        return
+
     click.echo(f"\nPage created successfully!")
     click.echo(f"Name: {result.get('name', 'N/A')}")
     click.echo(f"ID: {result.get('id', 'N/A')}")
@@ -491,20 +1137,7 @@ def update_page(doc_url_or_id, page_id_or_name, content, content_format, mode, n
     doc_id = extract_doc_id(doc_url_or_id)
 
     # Find the page
-    page_items = get_all_pages(doc_id, config)
-
-    target_page = None
-    for page in page_items:
-        if page['id'] == page_id_or_name or page['name'].lower() == page_id_or_name.lower():
-            target_page = page
-            break
-
-    if not target_page:
-        click.echo(f"Error: Page '{page_id_or_name}' not found in doc", err=True)
-        click.echo("\nAvailable pages:", err=True)
-        for page in page_items:
-            click.echo(f"  - {page['name']} (ID: {page['id']})", err=True)
-        raise click.Abort()
+    target_page = require_page(doc_id, page_id_or_name, config)
 
     page_id = target_page['id']
 
@@ -535,34 +1168,43 @@ def update_page(doc_url_or_id, page_id_or_name, content, content_format, mode, n
         click.echo("Error: No updates specified. Use --name, --subtitle, or --content", err=True)
         raise click.Abort()
 
-    # Show what will be updated
-    click.echo(f"\nAbout to update page '{target_page['name']}' in doc {doc_id}")
-    click.echo(f"Page URL: {target_page.get('browserLink', 'N/A')}")
-    click.echo("\nChanges:")
+    # Show what will be updated (on stderr when stdout carries records)
+    structured = output.structured()
+    click.echo(f"\nAbout to update page '{target_page['name']}' in doc {doc_id}", err=structured)
+    click.echo(f"Page URL: {target_page.get('browserLink', 'N/A')}", err=structured)
+    click.echo("\nChanges:", err=structured)
     if new_name:
-        click.echo(f"  - Rename to: {new_name}")
+        click.echo(f"  - Rename to: {new_name}", err=structured)
     if subtitle is not None:
-        click.echo(f"  - Update subtitle: {subtitle}")
+        click.echo(f"  - Update subtitle: {subtitle}", err=structured)
     if content:
         action = "Append to" if mode == "append" else "Replace"
         preview = content[:100] + "..." if len(content) > 100 else content
-        click.echo(f"  - {action} content ({len(content)} chars): {preview}")
+        click.echo(f"  - {action} content ({len(content)} chars): {preview}", err=structured)
 
     # Confirm before updating
     if not yes:
-        if not click.confirm("\nDo you want to proceed with this update?"):
-            click.echo("Update cancelled.")
+        if not click.confirm("\nDo you want to proceed with this update?", err=structured):
+            click.echo("Update cancelled.", err=structured)
             raise click.Abort()
 
-    click.echo(f"\nUpdating page...")
+    if not structured:
+        click.echo(f"\nUpdating page...")
 
     result = coda_request("PUT", f"docs/{doc_id}/pages/{page_id}", config, json=payload)
 
+    if structured:
+        output.emit(result)
+        return
+
     click.echo(f"\nPage updated successfully!")
     click.echo(f"Name: {result.get('name', 'N/A')}")
     click.echo(f"ID: {result.get('id', 'N/A')}")
     click.echo(f"URL: {result.get('browserLink', 'N/A')}")
 
 
+cli.add_command(daemon.daemon_commands(cli, Path(__file__)), name="daemon")
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,128 @@
+"""
+On-disk cache of exported Coda page content
+
+Bodies are stored gzip-compressed, one file per (doc, page, format,
+updatedAt). A page edit changes its updatedAt and so its cache key; the
+previous version is dropped when the new one is stored. The cache is
+bounded in size and evicts the least recently read entries first (reads
+bump the file's mtime).
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Cache hits are decompressed into memory up to this size, and into a temporary file beyond it
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class ContentCache:
+    """Size-bounded LRU cache of compressed page exports in a directory"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls, config, directory):
+        """Build a cache using the optional "content_cache" section of the coda config
+
+        Key: "max_mb" (0 disables the cache).
+        """
+        max_mb = float(config.get("content_cache", {}).get("max_mb", DEFAULT_MAX_BYTES / 1024 / 1024))
+        return cls(directory, int(max_mb * 1024 * 1024))
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def open(self, doc_id, page_id, output_format, updated_at):
+        """Return a binary file with the cached content, or None on a miss
+
+        The entry is decompressed once, into a spooled temporary file, and
+        gzip checks its CRC on the way. A truncated or corrupt entry is
+        removed and reported as a miss before the caller has written
+        anything.
+        """
+        if not self.enabled or not updated_at:
+            return None
+        path = self._path(doc_id, page_id, output_format, updated_at)
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            return None
+        content = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            with gzip.open(path, "rb") as compressed:
+                shutil.copyfileobj(compressed, content, COPY_CHUNK_SIZE)
+        except (OSError, EOFError):  # includes gzip.BadGzipFile
+            content.close()
+            path.unlink(missing_ok=True)
+            return None
+        content.seek(0)
+        return content
+
+    @contextmanager
+    def writer(self, doc_id, page_id, output_format, updated_at):
+        """Context manager yielding a binary file to write content into
+
+        The entry is only stored if the block finishes without an error.
+        When caching is disabled or updated_at is unknown the written
+        data is discarded.
+        """
+        if not self.enabled or not updated_at:
+            yield _NullWriter()
+            return
+
+        path = self._path(doc_id, page_id, output_format, updated_at)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with gzip.open(tmp_path, "wb", compresslevel=6) as compressed:
+                yield compressed
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        # Older versions of the page can't be hit again
+        for old_path in self.directory.glob(f"{self._page_prefix(doc_id, page_id, output_format)}-*.gz"):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+        tmp_path.replace(path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob("*.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _page_prefix(self, doc_id, page_id, output_format):
+        return hashlib.sha256(f"{doc_id}\0{page_id}\0{output_format}".encode()).hexdigest()[:32]
+
+    def _path(self, doc_id, page_id, output_format, updated_at):
+        version = hashlib.sha256(updated_at.encode()).hexdigest()[:16]
+        return self.directory / f"{self._page_prefix(doc_id, page_id, output_format)}-{version}.gz"
+
+
+class _NullWriter:
+    def write(self, data):
+        return len(data)
+
@@ -0,0 +1,75 @@
+"""
+On-disk layout and manifest for `coda export-doc`
+
+Pages are written as a tree that mirrors the doc: a page lives at
+<parent dirs>/<slug>.md and its subpages under <parent dirs>/<slug>/. The
+manifest (.coda-export.json in the output directory) records each page's
+updatedAt and path, so later runs only re-export pages that changed.
+"""
+
+import json
+import re
+from pathlib import PurePosixPath
+
+
+MANIFEST_NAME = ".coda-export.json"
+
+EXTENSIONS = {"markdown": ".md", "html": ".html"}
+
+
+def slugify(name):
+    """Turn a page name into a safe file name"""
+    slug = re.sub(r"[^\w\- ]+", "", name).strip()
+    slug = re.sub(r"\s+", "-", slug)
+    return slug or "untitled"
+
+
+def page_paths(pages, output_format):
+    """Map each page ID to its relative path in the export tree
+
+    Sibling pages with the same slug get their page ID appended so no two
+    pages share a file.
+    """
+    pages_by_id = {page["id"]: page for page in pages}
+    extension = EXTENSIONS[output_format]
+    dirs = {}
+
+    def page_dir(page_id, seen=()):
+        # Directory that holds a page's own file and its subpages
+        if page_id not in dirs:
+            page = pages_by_id[page_id]
+            parent_id = (page.get("parent") or {}).get("id")
+            if parent_id in pages_by_id and parent_id not in seen:
+                base = page_dir(parent_id, seen + (page_id,))
+            else:
+                base = PurePosixPath()
+            dirs[page_id] = base / names[page_id]
+        return dirs[page_id]
+
+    # Pick unique names among siblings first, in doc order
+    names = {}
+    taken = set()
+    for page in pages:
+        parent_id = (page.get("parent") or {}).get("id")
+        slug = slugify(page["name"])
+        if (parent_id, slug.casefold()) in taken:
+            slug = f"{slug}-{page['id']}"
+        taken.add((parent_id, slug.casefold()))
+        names[page["id"]] = slug
+
+    return {page["id"]: str(page_dir(page["id"]).with_suffix(extension)) for page in pages}
+
+
+def load_manifest(output_dir):
+    """Return the manifest of a previous export, or an empty one"""
+    try:
+        return json.loads((output_dir / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {"pages": {}}
+
+
+def save_manifest(output_dir, manifest):
+    path = output_dir / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    tmp_path.replace(path)
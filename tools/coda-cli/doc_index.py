@@ -0,0 +1,68 @@
+"""
+Per-doc cache of Coda page and table listings for the Coda CLI
+
+Maps page and table IDs and normalized names to their listing entries, so
+commands can resolve "Page Name" without paging through the whole doc.
+Each index records the doc's updatedAt; coda_cli.py rebuilds it when the
+doc has changed since.
+"""
+
+import json
+import re
+
+
+def normalize_name(name):
+    """Normalize a page or table name for lookups (case and spacing insensitive)"""
+    return re.sub(r"\s+", " ", name.strip()).casefold()
+
+
+class DocIndex:
+    """Page and table listings of one doc, indexed by ID and normalized name"""
+
+    def __init__(self, doc_id, updated_at, pages, tables, fresh=False):
+        self.doc_id = doc_id
+        self.updated_at = updated_at
+        self.pages = pages
+        self.tables = tables
+        # True when built from the API during this run rather than loaded from disk
+        self.fresh = fresh
+        self._pages_by_id, self._pages_by_name = _index(pages)
+        self._tables_by_id, self._tables_by_name = _index(tables)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save(), or return None if missing or unreadable"""
+        try:
+            data = json.loads(path.read_text())
+            return cls(data["doc_id"], data["updated_at"], data["pages"], data["tables"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps({
+            "doc_id": self.doc_id,
+            "updated_at": self.updated_at,
+            "pages": self.pages,
+            "tables": self.tables,
+        }))
+        tmp_path.replace(path)
+
+    def find_page(self, id_or_name):
+        """Return the page with this ID or name, or None"""
+        return self._pages_by_id.get(id_or_name) or self._pages_by_name.get(normalize_name(id_or_name))
+
+    def find_table(self, id_or_name):
+        """Return the table with this ID or name, or None"""
+        return self._tables_by_id.get(id_or_name) or self._tables_by_name.get(normalize_name(id_or_name))
+
+
+def _index(items):
+    by_id = {}
+    by_name = {}
+    for item in items:
+        by_id[item["id"]] = item
+        # Like a linear scan, the first item with a given name wins
+        by_name.setdefault(normalize_name(item["name"]), item)
+    return by_id, by_name
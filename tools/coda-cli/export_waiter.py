@@ -0,0 +1,87 @@
+"""
+Waiting for asynchronous Coda page exports
+
+Coda exports are started with a POST and then polled until they complete.
+ExportWaiter polls quickly at first (most exports finish within a second),
+then backs off exponentially with jitter up to a cap, and gives up at an
+overall deadline. Anything with a wait(poll, started_at) method can stand in
+for it, e.g. to poll differently for bulk exports.
+"""
+
+import random
+import time
+from collections import namedtuple
+
+
+DEFAULT_FIRST_POLL = 0.1
+DEFAULT_MAX_POLL_INTERVAL = 2.0
+DEFAULT_DEADLINE = 120.0
+
+# The final status response, how long the export took and how many polls it needed
+ExportResult = namedtuple("ExportResult", ["response", "seconds", "polls"])
+
+
+class ExportFailed(Exception):
+    """Coda reported the export as failed"""
+
+
+class ExportTimeout(Exception):
+    """The export did not complete before the deadline"""
+
+
+class ExportWaiter:
+    """Poll an export with capped, jittered exponential backoff and a deadline"""
+
+    def __init__(self, first_poll=DEFAULT_FIRST_POLL, max_poll_interval=DEFAULT_MAX_POLL_INTERVAL,
+                 deadline=DEFAULT_DEADLINE, multiplier=2.0, sleep=time.sleep, clock=time.monotonic):
+        self.first_poll = first_poll
+        self.max_poll_interval = max_poll_interval
+        self.deadline = deadline
+        self.multiplier = multiplier
+        self.sleep = sleep
+        self.clock = clock
+
+    @classmethod
+    def from_config(cls, config, deadline=None):
+        """Build a waiter from the optional "export" section of the coda config
+
+        Keys: "first_poll", "max_poll_interval" and "deadline" (seconds).
+        An explicit deadline (e.g. from a command-line option) wins.
+        """
+        export_config = config.get("export", {})
+        return cls(
+            first_poll=float(export_config.get("first_poll", DEFAULT_FIRST_POLL)),
+            max_poll_interval=float(export_config.get("max_poll_interval", DEFAULT_MAX_POLL_INTERVAL)),
+            deadline=float(deadline if deadline is not None else export_config.get("deadline", DEFAULT_DEADLINE)),
+        )
+
+    def wait(self, poll, started_at=None):
+        """Call poll() until it returns a completed status response
+
+        poll() returns the export status response; errors it raises are not
+        retried here (the request scheduler already retries transient ones).
+        started_at is the clock() value when the export was requested.
+        """
+        if started_at is None:
+            started_at = self.clock()
+        interval = self.first_poll
+        delay = interval
+        polls = 0
+
+        while True:
+            remaining = self.deadline - (self.clock() - started_at)
+            if remaining <= 0:
+                raise ExportTimeout(f"export did not complete within {self.deadline:g} s")
+            self.sleep(min(delay, remaining))
+
+            response = poll()
+            polls += 1
+            status = response.get("status")
+            if status == "complete":
+                return ExportResult(response, self.clock() - started_at, polls)
+            if status == "failed":
+                raise ExportFailed(response.get("error", "Unknown error"))
+
+            # Jitter keeps concurrent exports from polling in lockstep
+            interval = min(self.max_poll_interval, interval * self.multiplier)
+            delay = random.uniform(interval / 2, interval)
@@ -0,0 +1,148 @@
+"""
+Local columnar mirror of a Coda table for the Coda CLI
+
+A mirror stores one list per column (plus row IDs and row metadata) in a
+gzip-compressed JSON file, keyed by row ID, along with the sync token that
+lets coda_cli.py fetch only rows changed since the last sync. Keeping
+values column by column makes scans, filters and aggregations over a
+single column cheap and keeps the file small.
+"""
+
+import csv
+import gzip
+import json
+
+
+# Bump when the file layout changes; older mirrors are re-synced from scratch
+MIRROR_VERSION = 1
+
+# Row fields stored alongside the cell values
+ROW_FIELDS = ("name", "index", "createdAt", "updatedAt", "browserLink")
+
+
+class TableMirror:
+    """Column-oriented copy of one table's rows"""
+
+    def __init__(self, doc_id, table_id, table_name=None):
+        self.doc_id = doc_id
+        self.table_id = table_id
+        self.table_name = table_name
+        self.columns = []  # [{"id": ..., "name": ...}] in table order
+        self.row_ids = []
+        self.fields = {field: [] for field in ROW_FIELDS}
+        self.values = {}  # column ID -> list of cell values, aligned with row_ids
+        self.sync_token = None
+        self.synced_at = None
+        self.full_synced_at = None
+        self._positions = {}
+
+    @classmethod
+    def load(cls, path):
+        """Load a mirror saved with save(), or return None if missing or outdated"""
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return None
+        if data.get("version") != MIRROR_VERSION:
+            return None
+
+        mirror = cls(data["doc_id"], data["table_id"], data.get("table_name"))
+        mirror.columns = data["columns"]
+        mirror.row_ids = data["row_ids"]
+        mirror.fields = data["fields"]
+        mirror.values = data["values"]
+        mirror.sync_token = data.get("sync_token")
+        mirror.synced_at = data.get("synced_at")
+        mirror.full_synced_at = data.get("full_synced_at")
+        mirror._positions = {row_id: position for position, row_id in enumerate(mirror.row_ids)}
+        return mirror
+
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({
+                "version": MIRROR_VERSION,
+                "doc_id": self.doc_id,
+                "table_id": self.table_id,
+                "table_name": self.table_name,
+                "columns": self.columns,
+                "row_ids": self.row_ids,
+                "fields": self.fields,
+                "values": self.values,
+                "sync_token": self.sync_token,
+                "synced_at": self.synced_at,
+                "full_synced_at": self.full_synced_at,
+            }, f, separators=(",", ":"))
+        tmp_path.replace(path)
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def set_columns(self, columns):
+        """Record the table's columns, adding empty value lists for new ones"""
+        self.columns = [{"id": column["id"], "name": column["name"]} for column in columns]
+        for column in self.columns:
+            self.values.setdefault(column["id"], [None] * len(self.row_ids))
+
+    def clear(self):
+        """Drop every row (before a full sync)"""
+        self.row_ids = []
+        self.fields = {field: [] for field in ROW_FIELDS}
+        self.values = {column_id: [] for column_id in self.values}
+        self._positions = {}
+
+    def upsert(self, rows):
+        """Insert or update rows from the API; returns (inserted, updated) counts
+
+        A row older (by updatedAt) than the stored version is ignored.
+        """
+        inserted = updated = 0
+        for row in rows:
+            position = self._positions.get(row["id"])
+            if position is None:
+                position = len(self.row_ids)
+                self._positions[row["id"]] = position
+                self.row_ids.append(row["id"])
+                for column in self.fields.values():
+                    column.append(None)
+                for column in self.values.values():
+                    column.append(None)
+                inserted += 1
+            else:
+                stored_updated_at = self.fields["updatedAt"][position]
+                if stored_updated_at and row.get("updatedAt") and row["updatedAt"] < stored_updated_at:
+                    continue  # already have a newer version of this row
+                updated += 1
+
+            for field in ROW_FIELDS:
+                self.fields[field][position] = row.get(field)
+            for column_id, value in row.get("values", {}).items():
+                if column_id not in self.values:
+                    # Column added since the last columns listing
+                    self.values[column_id] = [None] * len(self.row_ids)
+                self.values[column_id][position] = value
+        return inserted, updated
+
+    def column_names(self):
+        """Return column ID -> name for the known columns"""
+        return {column["id"]: column["name"] for column in self.columns}
+
+    def write_csv(self, f):
+        """Write the mirror as CSV (row ID, row fields, then one column per table column)"""
+        column_ids = [column["id"] for column in self.columns]
+        writer = csv.writer(f)
+        writer.writerow(["id", *ROW_FIELDS, *(column["name"] for column in self.columns)])
+        columns = [self.row_ids, *(self.fields[field] for field in ROW_FIELDS),
+                   *(self.values[column_id] for column_id in column_ids)]
+        for row in zip(*columns):
+            writer.writerow([_csv_value(value) for value in row])
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
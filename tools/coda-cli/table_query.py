@@ -0,0 +1,146 @@
+"""
+Queries over local table mirrors for `coda query`
+
+Works on TableMirror's column lists rather than row dicts: each condition
+is evaluated over one column to narrow a list of row positions, sorting
+and grouping read just the key column, and only the projected columns are
+materialized for output.
+"""
+
+import operator
+import re
+from collections import Counter
+
+from table_mirror import ROW_FIELDS
+
+
+# Longest operators first so ">=" isn't read as ">"
+CONDITION = re.compile(r"^\s*(.+?)\s*(!=|>=|<=|=|>|<|~)\s*(.*?)\s*$")
+
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+class QueryError(ValueError):
+    """A query refers to an unknown column or can't be parsed"""
+
+
+def parse_condition(text):
+    """Parse "Column=value" (or !=, >, >=, <, <=, ~ for contains) into (column, op, value)"""
+    match = CONDITION.match(text)
+    if not match or not match.group(1):
+        raise QueryError(f"Can't parse condition '{text}' (expected e.g. Status=Done or Points>=3)")
+    return match.groups()
+
+
+def resolve_column(mirror, name):
+    """Return the value list for a column name/ID or a row field (id, name, updatedAt, ...)"""
+    for column in mirror.columns:
+        if column["id"] == name or column["name"].casefold() == name.casefold():
+            return mirror.values[column["id"]]
+    if name == "id":
+        return mirror.row_ids
+    for field in ROW_FIELDS:
+        if field.casefold() == name.casefold():
+            return mirror.fields[field]
+    raise QueryError(
+        f"Unknown column '{name}'. Columns: {', '.join(column['name'] for column in mirror.columns)}"
+    )
+
+
+def filter_positions(mirror, conditions):
+    """Return the positions of rows matching every (column, op, value) condition"""
+    positions = range(len(mirror))
+    for name, op, value in conditions:
+        column = resolve_column(mirror, name)
+        test = _predicate(op, value)
+        positions = [position for position in positions if test(column[position])]
+    return list(positions)
+
+
+def sort_positions(mirror, positions, name, descending=False):
+    """Sort row positions by a column; empty values always sort last"""
+    column = resolve_column(mirror, name)
+    present = [position for position in positions if column[position] not in (None, "")]
+    missing = [position for position in positions if column[position] in (None, "")]
+    present.sort(key=lambda position: _sort_key(column[position]), reverse=descending)
+    return present + missing
+
+
+def group_counts(mirror, positions, name):
+    """Count rows per value of a column; returns [(value, count)] largest group first"""
+    column = resolve_column(mirror, name)
+    counts = Counter(_group_key(column[position]) for position in positions)
+    return sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+
+
+def project(mirror, positions, names):
+    """Return (header, rows) for the given columns of the selected rows"""
+    columns = [resolve_column(mirror, name) for name in names]
+    rows = [[column[position] for column in columns] for position in positions]
+    return names, rows
+
+
+def format_cell(value, max_width=None):
+    """Render a cell value on one line, truncated to max_width characters"""
+    if value is None:
+        return ""
+    text = " ".join(_text(value).split())
+    if max_width and len(text) > max_width:
+        text = text[:max_width - 1] + "…"
+    return text
+
+
+def _predicate(op, value):
+    if op == "~":
+        needle = value.casefold()
+        return lambda cell: cell is not None and needle in _text(cell).casefold()
+
+    compare = OPERATORS[op]
+    number = _number(value)
+
+    def test(cell):
+        if cell is None or cell == "":
+            # Empty cells only match "Column=" / "Column!=" style conditions
+            return compare("", value) if op in ("=", "!=") else False
+        cell_number = _number(cell)
+        if number is not None and cell_number is not None:
+            return compare(cell_number, number)
+        if op in ("=", "!="):
+            return compare(_text(cell).casefold(), value.casefold())
+        return compare(_text(cell), value)
+
+    return test
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    if isinstance(value, list):
+        return ", ".join(_text(item) for item in value)
+    return str(value)
+
+
+def _sort_key(value):
+    # Numbers before text, so mixed columns still sort
+    number = _number(value)
+    return (0, number, "") if number is not None else (1, 0, _text(value).casefold())
+
+
+def _group_key(value):
+    return _text(value) if isinstance(value, list) else value
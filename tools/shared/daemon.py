@@ -0,0 +1,108 @@
+"""
+`daemon` commands for the pm-context CLIs
+
+`<tool> daemon start` launches a background process (see daemon_server.py)
+that serves commands forwarded by daemon_client.py with warm imports,
+config and connections. This module only defines the commands, and keeps
+its imports light because every CLI invocation loads it.
+"""
+
+import json
+import sys
+import time
+
+import click
+
+
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+
+
+def daemon_commands(cli, script):
+    """Return the `daemon` command group for a CLI defined in script"""
+
+    @click.group()
+    def daemon():
+        """Run commands through a warm background process (optional)"""
+
+    @daemon.command()
+    @click.option("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, show_default=True,
+                  help="Exit after this many seconds without commands")
+    def start(idle_timeout):
+        """Start the daemon in the background"""
+        if _control(script, "status") is not None:
+            click.echo("Daemon already running.")
+            return
+
+        import os
+        import subprocess
+
+        from daemon_client import socket_dir_is_private, socket_path
+
+        path = socket_path(script)
+        if os.path.lexists(os.path.dirname(path)) and not socket_dir_is_private(path):
+            click.echo(f"Error: {os.path.dirname(path)} must be a directory owned by you with mode 0700", err=True)
+            raise click.Abort()
+
+        subprocess.Popen(
+            [sys.executable, str(script), "daemon", "serve", "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        for _ in range(100):
+            status = _control(script, "status")
+            if status is not None:
+                click.echo(f"Daemon started (pid {status['pid']}).")
+                return
+            time.sleep(0.05)
+        click.echo("Error: daemon did not start", err=True)
+        raise click.Abort()
+
+    @daemon.command()
+    def stop():
+        """Stop the daemon"""
+        if _control(script, "stop") is None:
+            click.echo("Daemon not running.")
+        else:
+            click.echo("Daemon stopped.")
+
+    @daemon.command()
+    def status():
+        """Show whether the daemon is running"""
+        status = _control(script, "status")
+        if status is None:
+            click.echo("Daemon not running.")
+            return
+        uptime = time.time() - status["started_at"]
+        click.echo(f"Daemon running (pid {status['pid']}), up {uptime:.0f} s, {status['commands']} command(s) served")
+
+    @daemon.command(hidden=True)
+    @click.option("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT)
+    def serve(idle_timeout):
+        """Run the daemon in the foreground"""
+        from daemon_server import CliDaemon
+
+        CliDaemon(cli, script, idle_timeout=idle_timeout).serve()
+
+    return daemon
+
+
+def _control(script, action):
+    """Send a control request; returns the daemon's JSON reply ({} for none), or None if not running"""
+    import daemon_client
+    from daemon_client import EXIT, REQUEST, STDOUT, recv_frame, send_frame
+
+    sock = daemon_client.connect(script, timeout=5)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            send_frame(sock, REQUEST, json.dumps({"control": action}).encode())
+            reply = {}
+            while True:
+                kind, payload = recv_frame(sock)
+                if kind == STDOUT:
+                    reply = json.loads(payload)
+                elif kind == EXIT or kind is None:
+                    return reply
+        except OSError:
+            return None
@@ -0,0 +1,194 @@
+"""
+Thin client for the optional pm-context CLI daemon
+
+Usage: python daemon_client.py path/to/tool_cli.py [args...]
+
+If a daemon for the tool is running (`<tool> daemon start`), the command is
+forwarded to it over a Unix socket and its output, prompts and exit code
+are relayed; the daemon already has the CLI imported, the config parsed
+and HTTP connections open. Otherwise, or if the daemon is busy with
+another command or can't take this one, the CLI runs in this process
+exactly as before.
+
+Only stdlib modules that are cheap to import are used here, since this
+runs on every invocation.
+"""
+
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+import zlib
+
+
+# Frame: 1-byte type, 4-byte big-endian payload length, payload
+FRAME_HEADER = struct.Struct(">cI")
+
+# Client -> daemon
+REQUEST = b"q"     # JSON {"argv", "cwd", "env", "tty"} or {"control": ...}
+STDIN_DATA = b"i"  # stdin bytes sent in answer to a STDIN_READ (empty = EOF)
+
+# Daemon -> client
+ACCEPTED = b"a"    # sent when the daemon picks up a connection, before the REQUEST
+STDOUT = b"o"
+STDERR = b"e"
+STDIN_READ = b"i"  # 4-byte max size to read from stdin
+EXIT = b"x"        # JSON exit code
+RETRY = b"r"       # daemon can't run the command (e.g. code changed); run it in-process
+
+# How long to wait for a busy daemon before running in-process instead
+ACCEPT_TIMEOUT = 0.25
+
+# Set PM_CLI_NO_DAEMON=1 to always run in-process
+NO_DAEMON_ENV_VAR = "PM_CLI_NO_DAEMON"
+
+
+def socket_path(script):
+    """Return the daemon socket path for a CLI script"""
+    script = os.path.realpath(script)
+    name = os.path.splitext(os.path.basename(script))[0]
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    directory = os.path.join(base, f"pm-context-{os.getuid()}")
+    # Separate daemons for separate checkouts of the same tool
+    return os.path.join(directory, f"{name}-{zlib.crc32(script.encode()):08x}.sock")
+
+
+def socket_dir_is_private(path):
+    """Whether the socket's directory is a real directory only this user can use
+
+    Without XDG_RUNTIME_DIR it lives in a shared /tmp, where another user
+    could have created it first to serve or intercept commands.
+    """
+    try:
+        info = os.lstat(os.path.dirname(path))
+    except OSError:
+        return False
+    return (stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid()
+            and stat.S_IMODE(info.st_mode) == 0o700)
+
+
+def send_frame(sock, kind, payload=b""):
+    sock.sendall(FRAME_HEADER.pack(kind, len(payload)) + payload)
+
+
+def recv_frame(sock):
+    """Return (kind, payload), or (None, b"") if the connection closed"""
+    header = _recv_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None, b""
+    kind, length = FRAME_HEADER.unpack(header)
+    payload = _recv_exactly(sock, length) if length else b""
+    if payload is None:
+        return None, b""
+    return kind, payload
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def connect(script, timeout=None, accept_timeout=None):
+    """Connect to the tool's daemon, or return None if it isn't running
+
+    Never connects through a socket directory other users could control.
+
+    Also returns None if the daemon doesn't pick up the connection within
+    accept_timeout (default: timeout). Nothing has been sent yet at that
+    point, so the command can safely run elsewhere.
+    """
+    path = socket_path(script)
+    if not socket_dir_is_private(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout if accept_timeout is None else accept_timeout)
+    try:
+        sock.connect(path)
+        # The daemon serves one connection at a time; until it accepts this
+        # one, the connection only sits in the listen backlog
+        kind, _ = recv_frame(sock)
+    except OSError:
+        sock.close()
+        return None
+    if kind != ACCEPTED:
+        sock.close()
+        return None
+    sock.settimeout(timeout)
+    return sock
+
+
+def forward(script, args):
+    """Run a command in the daemon; returns its exit code, or None to run in-process"""
+    sock = connect(script, accept_timeout=ACCEPT_TIMEOUT)
+    if sock is None:
+        return None
+
+    request = {
+        "argv": args,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "tty": {"stdin": sys.stdin.isatty(), "stdout": sys.stdout.isatty(), "stderr": sys.stderr.isatty()},
+    }
+    with sock:
+        try:
+            send_frame(sock, REQUEST, json.dumps(request).encode())
+        except OSError:
+            return None
+
+        stdout = sys.stdout.buffer
+        stderr = sys.stderr.buffer
+        while True:
+            kind, payload = recv_frame(sock)
+            if kind is None:
+                # The daemon went away mid-command; don't risk running it twice
+                stderr.write(b"Error: lost connection to the CLI daemon\n")
+                return 1
+            if kind == STDOUT:
+                stdout.write(payload)
+                stdout.flush()
+            elif kind == STDERR:
+                stderr.write(payload)
+                stderr.flush()
+            elif kind == STDIN_READ:
+                size = struct.unpack(">I", payload)[0]
+                send_frame(sock, STDIN_DATA, os.read(sys.stdin.fileno(), size))
+            elif kind == EXIT:
+                return json.loads(payload)
+            elif kind == RETRY:
+                return None
+
+
+def run_in_process(script, args):
+    """Run the CLI script in this process, as `python script args...` would"""
+    import runpy
+
+    sys.argv = [script, *args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    runpy.run_path(script, run_name="__main__")
+
+
+def main():
+    script, args = sys.argv[1], sys.argv[2:]
+    # `daemon start/stop/status` manage the daemon, so they never go through it
+    if not os.environ.get(NO_DAEMON_ENV_VAR) and args[:1] != ["daemon"]:
+        try:
+            code = forward(script, args)
+        except BrokenPipeError:
+            # Output closed early (e.g. piped into head); exit quietly
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        if code is not None:
+            sys.exit(code)
+    run_in_process(script, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Server side of the optional pm-context CLI daemon
+
+CliDaemon keeps the CLI imported, config.json parsed and the shared HTTP
+session pool and request scheduler warm, listening on a Unix socket.
+daemon_client.py forwards each command to it; stdout/stderr are streamed
+back, stdin is read from the client on demand (so prompts and --stdin keep
+working) and the exit code is relayed. Commands run one at a time so they
+can share the warm state (they swap sys.stdout, os.environ and the working
+directory); a client that isn't accepted quickly runs in-process instead.
+
+The daemon exits after sitting idle and as soon as any of the tool's
+source files change, handing the command back to the client to run
+in-process.
+"""
+
+import io
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import daemon_client
+from daemon_client import ACCEPTED, EXIT, REQUEST, RETRY, STDERR, STDIN_DATA, STDIN_READ, STDOUT, recv_frame, send_frame
+
+
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+
+
+class _SocketWriter(io.RawIOBase):
+    """Raw output stream that sends each write to the client as a frame"""
+
+    def __init__(self, conn, kind):
+        self.conn = conn
+        self.kind = kind
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        send_frame(self.conn, self.kind, bytes(data))
+        return len(data)
+
+
+class _SocketReader(io.RawIOBase):
+    """Raw input stream that asks the client for stdin as it's read"""
+
+    def __init__(self, conn, before_read):
+        self.conn = conn
+        self.before_read = before_read
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        self.before_read()
+        send_frame(self.conn, STDIN_READ, len(buffer).to_bytes(4, "big"))
+        kind, payload = recv_frame(self.conn)
+        if kind != STDIN_DATA:
+            raise OSError("client went away while reading stdin")
+        buffer[:len(payload)] = payload
+        return len(payload)
+
+
+class _ClientTextStream(io.TextIOWrapper):
+    """Text stream that reports whether the client's stream is a terminal"""
+
+    def __init__(self, buffer, tty, **kwargs):
+        super().__init__(buffer, encoding="utf-8", errors="replace", **kwargs)
+        self._tty = tty
+
+    def isatty(self):
+        return self._tty
+
+
+def source_fingerprint(directories):
+    """Modification times of the Python sources the daemon has loaded"""
+    return sorted(
+        (str(path), path.stat().st_mtime_ns)
+        for directory in directories for path in Path(directory).glob("*.py")
+    )
+
+
+class CliDaemon:
+    """Serve CLI commands over a Unix socket until idle or outdated"""
+
+    def __init__(self, cli, script, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.cli = cli
+        self.script = str(Path(script).resolve())
+        self.idle_timeout = idle_timeout
+        self.source_dirs = [Path(self.script).parent, Path(__file__).parent]
+        self.fingerprint = source_fingerprint(self.source_dirs)
+        self.started_at = time.time()
+        self.commands = 0
+
+    def serve(self):
+        path = daemon_client.socket_path(self.script)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if not daemon_client.socket_dir_is_private(path):
+            raise PermissionError(f"{os.path.dirname(path)} must be a directory owned by you with mode 0700")
+        if os.path.exists(path):
+            os.unlink(path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen(16)
+        server.settimeout(self.idle_timeout)
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                conn.settimeout(None)
+                with conn:
+                    try:
+                        send_frame(conn, ACCEPTED)
+                    except OSError:
+                        continue  # client gave up waiting and runs in-process
+                    if not self._handle(conn):
+                        break
+        finally:
+            server.close()
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _handle(self, conn):
+        """Handle one connection; returns False when the daemon should exit"""
+        kind, payload = recv_frame(conn)
+        if kind != REQUEST:
+            return True
+        request = json.loads(payload)
+
+        control = request.get("control")
+        if control == "stop":
+            send_frame(conn, EXIT, b"0")
+            return False
+        if control == "status":
+            status = {"pid": os.getpid(), "started_at": self.started_at, "commands": self.commands}
+            send_frame(conn, STDOUT, json.dumps(status).encode())
+            send_frame(conn, EXIT, b"0")
+            return True
+
+        if source_fingerprint(self.source_dirs) != self.fingerprint:
+            # Code changed since the daemon started; let the client run it fresh
+            send_frame(conn, RETRY)
+            return False
+
+        self.commands += 1
+        try:
+            code = self._run(conn, request)
+            send_frame(conn, EXIT, json.dumps(code).encode())
+        except OSError:
+            pass  # client disconnected
+        return True
+
+    def _run(self, conn, request):
+        tty = request.get("tty", {})
+        stdout = _ClientTextStream(io.BufferedWriter(_SocketWriter(conn, STDOUT)), tty.get("stdout", False))
+        stderr = _ClientTextStream(io.BufferedWriter(_SocketWriter(conn, STDERR)), tty.get("stderr", False),
+                                   write_through=True)
+
+        def flush_output():
+            # Show prompts before waiting for input
+            stdout.flush()
+            stderr.flush()
+
+        stdin = _ClientTextStream(io.BufferedReader(_SocketReader(conn, flush_output)), tty.get("stdin", False))
+
+        saved = sys.stdin, sys.stdout, sys.stderr, os.getcwd(), dict(os.environ)
+        sys.stdin, sys.stdout, sys.stderr = stdin, stdout, stderr
+        os.environ.clear()
+        os.environ.update(request.get("env", {}))
+        code = 1
+        try:
+            os.chdir(request.get("cwd") or saved[3])
+            self.cli.main(args=request["argv"], prog_name=os.path.basename(self.script), standalone_mode=True)
+            code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            try:
+                stdout.flush()
+                stderr.flush()
+            finally:
+                sys.stdin, sys.stdout, sys.stderr = saved[:3]
+                os.chdir(saved[3])
+                os.environ.clear()
+                os.environ.update(saved[4])
+        return code
@@ -0,0 +1,172 @@
+"""
+Shared HTTP transport for the pm-context CLIs
+
+Keeps one pooled, keep-alive requests.Session per host so that repeated API
+calls reuse TCP/TLS connections instead of handshaking on every request.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import tracing
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+
+# Set PM_CLI_HTTP_STATS=1 to print per-host latency stats on exit
+STATS_ENV_VAR = "PM_CLI_HTTP_STATS"
+
+
+class LatencyStats:
+    """Per-host request counts and latency totals"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def record(self, host, seconds):
+        with self._lock:
+            stats = self._hosts.setdefault(host, {"count": 0, "total": 0.0, "min": None, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            stats["min"] = seconds if stats["min"] is None else min(stats["min"], seconds)
+
+    def snapshot(self):
+        """Return a copy of the per-host stats"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._hosts.items()}
+
+    def summary_lines(self):
+        """Format the stats as human-readable lines"""
+        lines = []
+        for host, stats in sorted(self.snapshot().items()):
+            avg_ms = stats["total"] / stats["count"] * 1000
+            lines.append(
+                f"{host}: {stats['count']} request(s), "
+                f"avg {avg_ms:.1f} ms, min {stats['min'] * 1000:.1f} ms, "
+                f"max {stats['max'] * 1000:.1f} ms, total {stats['total']:.2f} s"
+            )
+        return lines
+
+
+class SessionPool:
+    """Persistent keep-alive sessions, one per host"""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = LatencyStats()
+        self._sessions = {}
+        self._connections_seen = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a pool from the optional "http" section of a tool config"""
+        return cls(**cls.settings(config))
+
+    @staticmethod
+    def settings(config):
+        """Return the pool's constructor arguments from a tool config"""
+        http_config = config.get("http", {})
+        return {
+            "pool_size": int(http_config.get("pool_size", DEFAULT_POOL_SIZE)),
+            "connect_timeout": float(http_config.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT)),
+            "read_timeout": float(http_config.get("read_timeout", DEFAULT_READ_TIMEOUT)),
+        }
+
+    def session_for(self, url):
+        """Return the shared session for the host of a URL, creating it on first use"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                # requests is slow to import; only pay for it once a request is made
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["Accept-Encoding"] = "gzip, deflate"
+                self._sessions[host] = session
+            return session
+
+    def request(self, method, url, **kwargs):
+        """Send a request over the pooled session for its host"""
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session_for(url)
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"{method.upper()} {host}", "http", path=urlsplit(url).path) as span:
+                response = session.request(method, url, **kwargs)
+                # Streamed responses haven't been read yet; fall back to the declared size
+                size = response.headers.get("Content-Length") if kwargs.get("stream") else len(response.content)
+                span.set(status=response.status_code, bytes=int(size or 0),
+                         new_connections=self._new_connections(session, host, url))
+                return response
+        finally:
+            self.stats.record(host, time.perf_counter() - start)
+
+    def _new_connections(self, session, host, url):
+        """Return how many connections to host were opened since the last request (for tracing)
+
+        A new connection means a request also paid for DNS, TCP and TLS setup.
+        With concurrent requests the count goes to whichever finishes first.
+        """
+        try:
+            pools = session.get_adapter(url).poolmanager.pools
+            opened = sum(pools[key].num_connections for key in pools.keys())
+        except Exception:
+            return 0
+        with self._lock:
+            seen = self._connections_seen.get(host, 0)
+            self._connections_seen[host] = opened
+        return max(opened - seen, 0)
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._connections_seen.clear()
+
+
+_pool = None
+_pool_settings = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(config):
+    """Return the process-wide session pool, configuring it on first use
+
+    The pool is rebuilt when the config's "http" settings change, so an
+    edited config.json takes effect in a long-running daemon too.
+    """
+    global _pool, _pool_settings
+    settings = SessionPool.settings(config)
+    with _pool_lock:
+        if _pool is None or settings != _pool_settings:
+            if _pool is not None:
+                _pool.close()
+            _pool = SessionPool(**settings)
+            _pool_settings = settings
+            if os.environ.get(STATS_ENV_VAR):
+                atexit.register(_print_stats, _pool)
+        return _pool
+
+
+def _print_stats(pool):
+    for line in pool.stats.summary_lines():
+        print(f"[http] {line}", file=sys.stderr)
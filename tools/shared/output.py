@@ -0,0 +1,108 @@
+"""
+Machine-readable output for the pm-context CLIs
+
+With `--output-format ndjson` a command writes one JSON object per record (task,
+doc, page, row, result of an update, ...) to stdout, one per line; with
+`--output-format json` the same records form a single JSON array. Either way
+records are written as they are produced, through one buffered writer that
+flushes in large blocks, and are never truncated the way the text output
+is. Headers, confirmations and other human-oriented text are left out;
+errors still go to stderr.
+
+Commands check structured() and hand their records to emit(); in the
+default text format nothing here is used.
+"""
+
+import json
+import sys
+
+import click
+
+
+FORMATS = ("text", "ndjson", "json")
+
+# Bytes of encoded records collected before writing them to stdout
+BUFFER_SIZE = 64 * 1024
+
+
+class RecordWriter:
+    """Writes records as NDJSON lines or one JSON array, in large blocks"""
+
+    def __init__(self, stream, array=False, buffer_size=BUFFER_SIZE):
+        self.stream = stream
+        self.array = array
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._chunks = []
+        self._buffered = 0
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        if self.array:
+            line = ("[" if not self.count else ",") + line
+        self.count += 1
+        self._append(line + "\n")
+
+    def close(self):
+        """Write out what is buffered (and end the JSON array)"""
+        if self.array:
+            self._append("]\n" if self.count else "[]\n")
+        self.flush()
+
+    def flush(self):
+        if self._chunks:
+            data = "".join(self._chunks).encode("utf-8")
+            self._chunks = []
+            self._buffered = 0
+            self.stream.write(data)
+        self.stream.flush()
+
+    def _append(self, text):
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+
+_writer = None
+
+
+def structured():
+    """Return True if the running command should emit records instead of text"""
+    return _writer is not None
+
+
+def emit(record):
+    """Write one record to stdout (buffered)"""
+    _writer.write(record)
+
+
+def options(f):
+    """Add the --output-format option to a CLI group
+
+    Not --format, which several commands already use for their content or
+    input format.
+    """
+    return click.option("--output-format", "output_format", type=click.Choice(FORMATS), default="text",
+                        show_default=True,
+                        help="Output format: human-readable text, one JSON object per line, or a JSON array")(f)
+
+
+def start_for_command(ctx, output_format):
+    """Set up the output format of the command about to run in ctx"""
+    global _writer
+    if output_format == "text":
+        _writer = None
+        return
+
+    # Text written so far (none, normally) must come before the records
+    sys.stdout.flush()
+    writer = RecordWriter(click.get_binary_stream("stdout"), array=output_format == "json")
+    _writer = writer
+
+    def finish():
+        global _writer
+        _writer = None
+        writer.close()
+
+    ctx.call_on_close(finish)
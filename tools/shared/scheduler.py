@@ -0,0 +1,244 @@
+"""
+Shared request scheduler for the pm-context CLIs
+
+Paces requests to each API with token buckets set to its documented quota,
+honors Retry-After on 429 responses and retries transient failures with
+jittered exponential backoff. Concurrent callers share one scheduler per
+API, so parallel features run as fast as the API allows without tripping
+its limits.
+"""
+
+import atexit
+import os
+import random
+import sys
+import threading
+import time
+
+import tracing
+
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Status codes worth retrying; 429 is always retried, the rest only for
+# idempotent methods so a POST is never sent twice
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Set PM_CLI_HTTP_STATS=1 to print scheduler stats on exit (shared with http_session)
+STATS_ENV_VAR = "PM_CLI_HTTP_STATS"
+
+
+class TokenBucket:
+    """Token bucket that adapts its rate to 429 responses
+
+    Starts at the full quota, halves the rate whenever the API says we are
+    too fast, and creeps back up to the quota as requests succeed.
+    """
+
+    def __init__(self, requests_per_window, window_seconds):
+        self.capacity = float(requests_per_window)
+        self.max_rate = requests_per_window / window_seconds
+        self.min_rate = self.max_rate / 16
+        self.rate = self.max_rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._last_throttle = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def throttle(self):
+        """Slow down after a 429
+
+        Concurrent requests tend to be rejected together, so the rate is
+        halved at most once per second.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_throttle >= 1.0:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._last_throttle = now
+            self._tokens = min(self._tokens, 0.0)
+
+    def recover(self):
+        """Speed back up towards the quota after a successful request"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+
+class RequestScheduler:
+    """Rate limiting, Retry-After handling and retries for one API
+
+    limits maps a bucket name ("read", and optionally "write") to a
+    (requests, per_seconds) quota. GET/HEAD requests use the "read" bucket;
+    other methods use "write" when it exists.
+    """
+
+    def __init__(self, name, limits, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX):
+        self.name = name
+        self.buckets = {bucket: TokenBucket(*quota) for bucket, quota in limits.items()}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    @classmethod
+    def from_config(cls, name, config, default_limits):
+        """Build a scheduler, letting the tool config override quotas and retries
+
+        Optional config keys: "rate_limits" ({"read": {"requests": 100,
+        "per_seconds": 6}, ...}) and "max_retries".
+        """
+        limits, max_retries = _settings(config, default_limits)
+        return cls(name, dict(limits), max_retries=max_retries)
+
+    def send(self, method, send_request):
+        """Send a request through the scheduler and return the final response
+
+        send_request() performs one attempt and returns a requests.Response.
+        The last response (or exception) is returned (or raised) once
+        retries run out.
+        """
+        import requests
+
+        method = method.upper()
+        bucket = self.buckets["write"] if method not in ("GET", "HEAD") and "write" in self.buckets \
+            else self.buckets["read"]
+
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_turn(bucket)
+            last_attempt = attempt == self.max_retries
+
+            try:
+                response = send_request()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt or method not in IDEMPOTENT_METHODS:
+                    raise
+                self._backoff(attempt)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                if response.status_code < 400:
+                    bucket.recover()
+                return response
+
+            if response.status_code == 429:
+                # Hold every caller until Retry-After passes, then go slower
+                self._count("rate_limited")
+                bucket.throttle()
+                self._pause(response.headers.get("Retry-After"), attempt)
+            elif method in IDEMPOTENT_METHODS:
+                self._backoff(attempt)
+            else:
+                return response
+
+        return response
+
+    def stats(self):
+        """Return a snapshot of request, retry, queue and wait counters"""
+        with self._lock:
+            return dict(self._stats)
+
+    def summary_line(self):
+        stats = self.stats()
+        return (
+            f"{self.name}: {stats['requests']} request(s), {stats['retries']} retried, "
+            f"{stats['rate_limited']} rate-limited, max queue depth {stats['max_queue_depth']}, "
+            f"waited {stats['total_wait']:.2f} s total (max {stats['max_wait']:.2f} s)"
+        )
+
+    def _wait_for_turn(self, bucket):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["queue_depth"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queue_depth"])
+
+        wait = max(bucket.reserve(), self._paused_until - time.monotonic())
+        if wait > 0:
+            with tracing.span(f"{self.name} rate limit", "wait"):
+                time.sleep(wait)
+
+        with self._lock:
+            self._stats["queue_depth"] -= 1
+            self._stats["total_wait"] += max(wait, 0.0)
+            self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+
+    def _pause(self, retry_after, attempt):
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = self._backoff_delay(attempt)
+        with self._lock:
+            self._stats["retries"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def _backoff(self, attempt):
+        self._count("retries")
+        with tracing.span(f"{self.name} retry backoff", "wait", attempt=attempt + 1):
+            time.sleep(self._backoff_delay(attempt))
+
+    def _backoff_delay(self, attempt):
+        # Full jitter: anywhere between 0 and the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+
+def _settings(config, default_limits):
+    """Return (quotas, max_retries) from a tool config, in a comparable form"""
+    limits = dict(default_limits)
+    for bucket, quota in config.get("rate_limits", {}).items():
+        limits[bucket] = (quota["requests"], quota["per_seconds"])
+    return tuple(sorted(limits.items())), int(config.get("max_retries", DEFAULT_MAX_RETRIES))
+
+
+# API name -> (scheduler, the settings it was built from)
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(name, config, default_limits):
+    """Return the process-wide scheduler for an API, creating it on first use
+
+    The scheduler is rebuilt when the config's quotas or retry count change,
+    so an edited config.json takes effect in a long-running daemon too.
+    """
+    settings = _settings(config, default_limits)
+    with _schedulers_lock:
+        scheduler, current = _schedulers.get(name, (None, None))
+        if scheduler is None or settings != current:
+            scheduler = RequestScheduler.from_config(name, config, default_limits)
+            _schedulers[name] = (scheduler, settings)
+            if os.environ.get(STATS_ENV_VAR):
+                atexit.register(_print_stats, scheduler)
+        return scheduler
+
+
+def _print_stats(scheduler):
+    print(f"[scheduler] {scheduler.summary_line()}", file=sys.stderr)
@@ -0,0 +1,233 @@
+"""
+Request tracing for the pm-context CLIs
+
+With `--trace` or `--trace-file`, a command records a span for every API
+call (endpoint, status, bytes and duration, including rate-limit waits and
+retries), for every HTTP attempt underneath it, and for local phases such
+as pagination, export polling, filtering, grouping and rendering. When the
+command finishes, a per-span summary is printed to stderr and/or the spans
+are written as a Chrome trace (open it in https://ui.perfetto.dev or
+chrome://tracing).
+
+Tracing is off unless a command enables it; span() then returns a shared
+no-op object.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import click
+
+
+# Summary sections, in display order
+CATEGORIES = ("phase", "api", "http", "wait")
+
+# Endpoint path segments that look like IDs (contain a digit) are grouped together
+ID_SEGMENT = re.compile(r"^[^/]*\d[^/]*$")
+
+
+class Span:
+    """A timed operation; use as a context manager or call finish()"""
+
+    __slots__ = ("tracer", "name", "category", "attrs", "start", "end", "thread")
+
+    def __init__(self, tracer, name, category, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.thread = threading.current_thread()
+        self.end = None
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        """Attach attributes (status, bytes, counts, ...) to the span"""
+        self.attrs.update(attrs)
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+            self.tracer.record(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs.setdefault("error", exc_type.__name__)
+        self.finish()
+        return False
+
+    @property
+    def seconds(self):
+        return self.end - self.start
+
+
+class _NullSpan:
+    """Stand-in returned by span() while tracing is off"""
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects finished spans from every thread of one command"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def span(self, name, category="phase", **attrs):
+        return Span(self, name, category, attrs)
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary_lines(self):
+        """Format the spans as a table of count/total/avg/max time per span name"""
+        with self._lock:
+            spans = list(self.spans)
+
+        rows = {}
+        for span in spans:
+            row = rows.setdefault((span.category, span.name), {"count": 0, "total": 0.0, "max": 0.0,
+                                                               "bytes": 0, "statuses": {}})
+            row["count"] += 1
+            row["total"] += span.seconds
+            row["max"] = max(row["max"], span.seconds)
+            row["bytes"] += span.attrs.get("bytes") or 0
+            status = span.attrs.get("status") or span.attrs.get("error")
+            if status is not None:
+                row["statuses"][status] = row["statuses"].get(status, 0) + 1
+
+        http_spans = [span for span in spans if span.category == "http"]
+        received = sum(span.attrs.get("bytes") or 0 for span in http_spans)
+        connections = sum(span.attrs.get("new_connections") or 0 for span in http_spans)
+        lines = [
+            f"{time.perf_counter() - self.started_at:.2f} s wall time, {len(http_spans)} HTTP request(s), "
+            f"{_format_bytes(received)} received, {connections} new connection(s)",
+            f"{'span':<48} {'count':>6} {'total':>9} {'avg':>9} {'max':>9} {'bytes':>9}  status",
+        ]
+        order = {category: position for position, category in enumerate(CATEGORIES)}
+        for (category, name), row in sorted(rows.items(), key=lambda item: (order.get(item[0][0], len(order)),
+                                                                             -item[1]["total"])):
+            label = f"{category}: {name}"
+            if len(label) > 48:
+                label = label[:47] + "…"
+            statuses = ", ".join(f"{status}×{count}" for status, count in sorted(row["statuses"].items(), key=str))
+            lines.append(
+                f"{label:<48} {row['count']:>6} {_format_ms(row['total']):>9} "
+                f"{_format_ms(row['total'] / row['count']):>9} {_format_ms(row['max']):>9} "
+                f"{_format_bytes(row['bytes']) if row['bytes'] else '':>9}  {statuses}"
+            )
+        return lines
+
+    def chrome_trace(self):
+        """Return the spans in Chrome's trace event format"""
+        with self._lock:
+            spans = list(self.spans)
+
+        pid = os.getpid()
+        thread_ids = {}
+        events = []
+        for span in spans:
+            if span.thread not in thread_ids:
+                thread_ids[span.thread] = len(thread_ids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_ids[span.thread],
+                               "args": {"name": span.thread.name}})
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - self.started_at) * 1e6, 1),
+                "dur": round(span.seconds * 1e6, 1),
+                "pid": pid,
+                "tid": thread_ids[span.thread],
+                "args": span.attrs,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+
+_tracer = None
+
+
+def span(name, category="phase", **attrs):
+    """Start a span on the active tracer (a no-op while tracing is off)"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, **attrs)
+
+
+def endpoint_template(endpoint):
+    """Return an API endpoint with its IDs replaced, e.g. "tasks/{id}/subtasks" """
+    return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in endpoint.split("/"))
+
+
+def options(f):
+    """Add the --trace and --trace-file options to a CLI group"""
+    f = click.option("--trace-file", type=click.Path(dir_okay=False, writable=True),
+                     help="Write a Chrome trace (JSON) of the command to this file")(f)
+    f = click.option("--trace", is_flag=True,
+                     help="Print where the time went (API calls, waits, local phases) to stderr")(f)
+    return f
+
+
+def start_for_command(ctx, summary, trace_file):
+    """Trace the command about to run in ctx, reporting when its context closes"""
+    global _tracer
+    if not summary and not trace_file:
+        _tracer = None
+        return
+
+    tracer = Tracer()
+    _tracer = tracer
+    command_span = tracer.span(ctx.invoked_subcommand or ctx.info_name)
+
+    def report():
+        global _tracer
+        command_span.finish()
+        _tracer = None
+        if trace_file:
+            tracer.write_chrome_trace(trace_file)
+        if summary:
+            for line in tracer.summary_lines():
+                print(f"[trace] {line}", file=sys.stderr)
+            if trace_file:
+                print(f"[trace] Chrome trace written to {trace_file}", file=sys.stderr)
+
+    ctx.call_on_close(report)
+
+
+def _format_ms(seconds):
+    return f"{seconds * 1000:.1f}ms"
+
+
+def _format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"